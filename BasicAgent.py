@@ -1,7 +1,11 @@
+import collections
 import Environment
 import numpy as np
-import random
+import CellGrid
+import CellPool
 import Clue
+import KnowledgeBase
+import Trace
 
 
 # newEnvironment = minesweeperVScode.Environment # Load original environment -> used to compare with moves and update
@@ -30,46 +34,72 @@ class BasicAgent():
 
     7)  • If no hidden cell can be conclusively identified as a mine or safe, pick a cell to reveal uniformly at random from
             the remaining cells.
+
+    8)  • If the total number of mines is given, use it as a global constraint: with every mine found the remaining
+            cells are safe, and with as many remaining cells as mines left they are all mines.
+
+    Moves, clues, marks and knowledge base dumps are reported to an optional Trace.Tracer instead of being printed, and
+    the time spent in each phase to an optional Profiler.Profiler.
     """
 
-    def __init__(self, height=50, width=50):
+    def __init__(self, height=50, width=50, mines=None, tracer=None, profiler=None):
 
         # Initialize the dimensions of the board,set the height and width
         self.height = height
         self.width = width
+        self.mines = mines  # total number of mines on the board, if known
 
-        self.track_moves = set()  # Keep a track of the moves which have been made
-        self.total_cells = set()  # as well as a set of all board cells -> total cells
+        # What is known about every cell (played, known safe, known mine), one byte per cell. The sets below are read-only
+        # views of it
+        self.cellGrid = CellGrid.CellGrid(height, width)
 
-        for x in range(height):
-            for y in range(width):
-                self.total_cells.add((x, y))  # adds all locations (x,y) into all cells
+        self.track_moves = self.cellGrid.view(CellGrid.REVEALED)  # Keep a track of the moves which have been made
+        self.unknownCells = CellPool.CellPool(height, width)  # as well as the cells not played and not known to be mines
 
-        self.mineSet = set()  # keep a track of the board cells known to be mines
-        self.safeSet = set()  # keep a track of the board cells known to be safes
+        self.mineSet = self.cellGrid.view(CellGrid.MINE)  # keep a track of the board cells known to be mines
+        self.safeSet = self.cellGrid.view(CellGrid.SAFE)  # keep a track of the board cells known to be safes
+        self.safeQueue = collections.deque()  # known safe cells that have not been played yet, in the order found
 
         # List of clues (set of cells and count of how many are mines)
-        self.knowledgeBase = []
+        self.knowledgeBase = KnowledgeBase.KnowledgeBase()
         # Example knowledge base: [((set of cells) = count), ((set2 of cells) = count), ((set3 of cells) = count)]
 
+        # How many clues were processed and cells marked during the last move (see KnowledgeBase.Counters)
+        self.propagationStats = self.knowledgeBase.Counters()
+
+        # Where to report what the agent does. Events are only built when their level is enabled
+        self.tracer = tracer
+        self.traceLevel = tracer.level if tracer is not None else Trace.OFF
+
+        # Where to record the time spent in each phase (see Profiler), if any
+        self.profiler = profiler
+        if profiler is not None:
+            for phase in ("SimplifyKnowledgeBase", "MarkMine", "MarkSafe"):
+                setattr(self, phase, profiler.wrap(phase, getattr(self, phase)))
+            self.add_knowledge_many = profiler.wrapMove("add_knowledge_many", self.add_knowledge_many,
+                                                        lambda: {"knowledgeBase": len(self.knowledgeBase)})
+
     def MarkMine(self, cell):
         """
         Add the cell to the set of board cells known to be mines.
-        For each clue in the knowledge base, mark the cell as a mine as well.
+        For each clue in the knowledge base that contains the cell, mark the cell as a mine as well.
         This updates the cell as a mine in the total knowledge base.
         """
-        self.mineSet.add(cell)
-        for clue in self.knowledgeBase:
-            clue.MarkMine(cell)
+        self.cellGrid.add(cell, CellGrid.MINE)
+        self.unknownCells.discard(cell)
+        if self.traceLevel >= Trace.MARKS:
+            self.tracer.emit("mine", cell=cell)
+        self.knowledgeBase.MarkMine(cell)
 
     def MarkSafe(self, cell):
         """
         Add the cell to the set of board cells known to be safes.
-        For each clue in the knowledge base, mark the cell as a safe as well.
+        For each clue in the knowledge base that contains the cell, mark the cell as a safe as well.
         This updates the cell as a safe in the total knowledge base.
         """
-        for clue in self.knowledgeBase:
-            clue.MarkSafe(cell)
+        if self.traceLevel >= Trace.MARKS:
+            self.tracer.emit("safe", cell=cell)
+        self.knowledgeBase.MarkSafe(cell)
 
     def add_knowledge(self, cell, count):
         """
@@ -79,62 +109,105 @@ class BasicAgent():
         mark any other cell as safe or mine that can be inferred using basic inference techniques, and finally update
         the knowledge base with any new clues that can be inferred.
         """
+        self.add_knowledge_many([(cell, count)])
 
-        # add cell to list of moves that have been made
-        self.track_moves.add(cell)
-
-        # add cell to list of safe cells
-        self.MarkSafe(cell)
-
-        updatedKnowledgeBase = []
-        # parse through the neighbors/surrounding cells of the current cell
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # If the cell is within board dimensions, and is identified to be a mine, add it as a new knowledge
-                if 0 <= i < self.height and 0 <= j < self.width:  # in bounds
-                    if (i, j) not in self.track_moves and (i, j) not in self.safeSet:
-                        updatedKnowledgeBase.append((i, j))
-                        # for a given move, check if cell location is in set of moves_made or in set of safes
-
-        # add the new Knowledge to the knowledge base, calling the Clue class
-        if len(updatedKnowledgeBase) != 0:
-            self.knowledgeBase.append(Clue.Clue(updatedKnowledgeBase, count))
-
-        while self.SimplifyKnowledgeBase() != self.knowledgeBase:
-            pass
-
+    def add_knowledge_many(self, cells):
         """
-        Print a text based representation of the sets for easy user viewing within the terminal
-        USE FOR TESTING OUTPUTS!!
+        Same as add_knowledge, for a whole batch of revealed cells given as (cell, count) pairs, such as the cells
+        opened by Environment.floodReveal. Every cell is marked as safe and gets its clue first, and the knowledge base
+        is then simplified once for the whole batch.
         """
-        print("\n\n\n\n")
-        print("------------------------------------------------------------------")
-        print("\nCurrent move made: ", cell)
-        print("Current Knowledge Base: ")
-        for clue in self.knowledgeBase:
-            print(clue)
-        print("\nConfirmed Safe Cells: ")
-        print(self.safeSet)
-
-        print("\nConfirmed Mine Cells: ")
-        print(self.mineSet)
-        print("------------------------------------------------------------------")
+        # start counting the propagation work done for this move
+        self.knowledgeBase.ResetCounters()
+
+        for cell, count in cells:
+            # add cell to list of moves that have been made
+            self.cellGrid.add(cell, CellGrid.REVEALED)
+            self.unknownCells.discard(cell)
+            if self.traceLevel >= Trace.MOVES:
+                self.tracer.emit("move", cell=cell, count=count)
+
+            # a revealed cell is no longer a safe move waiting to be made
+            self.cellGrid.discard(cell, CellGrid.SAFE)
+
+            # add cell to list of safe cells
+            self.MarkSafe(cell)
+
+        flags = self.cellGrid.cells
+        for cell, count in cells:
+            updatedKnowledgeBase = []
+            # parse through the neighbors/surrounding cells of the current cell
+            for i in range(cell[0] - 1, cell[0] + 2):
+                for j in range(cell[1] - 1, cell[1] + 2):
+
+                    # Ignore the cell itself
+                    if (i, j) == cell:
+                        continue
+
+                    # If the cell is within board dimensions, and is identified to be a mine, add it as a new knowledge
+                    if 0 <= i < self.height and 0 <= j < self.width:  # in bounds
+                        known = flags[i * self.width + j]
+                        if known & CellGrid.MINE:
+                            count -= 1  # known mines are left out of the clue and taken off its count
+                        elif not known & (CellGrid.REVEALED | CellGrid.SAFE):
+                            updatedKnowledgeBase.append((i, j))
+                            # for a given move, check if cell location is in set of moves_made or in set of safes
+
+            # add the new Knowledge to the knowledge base, calling the Clue class
+            if len(updatedKnowledgeBase) != 0:
+                self.knowledgeBase.append(Clue.Clue(updatedKnowledgeBase, count))
+                if self.traceLevel >= Trace.KNOWLEDGE:
+                    self.tracer.emit("clue", cells=Trace.cells(updatedKnowledgeBase), count=count)
+
+        self.SimplifyKnowledgeBase()
+        self.propagationStats = self.knowledgeBase.Counters()
+        self.knowledgeBase.ResetCounters()  # the per-clue counts are not needed once the move is summed up
+        if self.profiler is not None:
+            self.profiler.count("cellsRevealed", len(cells))
+            self.profiler.count("cluesProcessed", self.propagationStats["cluesProcessed"])
+            self.profiler.count("cellsMarked", self.propagationStats["cellsMarked"])
+
+        # Report a text based representation of the sets for easy viewing while testing
+        if self.traceLevel >= Trace.STATE:
+            self.traceState()
 
     def move_safely(self):
         """
-        Picks a safe move from the set of safe moves (safeSet) available to make. If there is not a safe move to be made
-        the function does not return anything
+        Picks a safe move from the set of safe moves (safeSet) available to make, in the order they were found. If there
+        is not a safe move to be made the function does not return anything
+        """
+        while True:
+            while self.safeQueue:
+                move = self.safeQueue.popleft()
+                if self.cellGrid.has(move, CellGrid.SAFE):  # cells revealed in the meantime have left safeSet
+                    self.cellGrid.discard(move, CellGrid.SAFE)
+                    return move
+            if not self.globalInferences():
+                break
+        if self.traceLevel >= Trace.MOVES:
+            self.tracer.emit("noSafeMove")
+        return None
+
+    def globalInferences(self):
+        """
+        Use the total number of mines, if the agent was given it: once every mine has been found all the undecided cells
+        are safe, and once the undecided cells are as many as the mines left they are all mines. Only called without a
+        safe move, when every cell of the pool is undecided. Returns True if anything new was found.
         """
-        if len(self.safeSet) > 0:
-            return self.safeSet.pop()
-        else:
-            print("No safe moves to be made :(")
-            return None
+        if self.mines is None or len(self.unknownCells) == 0:
+            return False
+        remaining = self.mines - len(self.mineSet)
+        if remaining == 0:
+            for cell in list(self.unknownCells):
+                self.cellGrid.add(cell, CellGrid.SAFE)
+                self.safeQueue.append(cell)
+                self.MarkSafe(cell)
+            return True
+        if remaining == len(self.unknownCells):
+            for cell in list(self.unknownCells):
+                self.MarkMine(cell)
+            return True
+        return False
 
     def move_randomly(self):
         """
@@ -142,40 +215,55 @@ class BasicAgent():
         already been made - moves that have been identified as mines). If there is not a random move, available moves ≤ 0
         to be made the function does not return anything
         """
-        availableMoves = self.total_cells - self.track_moves - self.mineSet  # makes a move that has not already been made and is known to not be a mine
-        if len(availableMoves) > 0:
-            return random.choice(tuple(availableMoves))
-        else:
-            return None
+        return self.unknownCells.choice()  # makes a move that has not already been made and is known to not be a mine
 
     def SimplifyKnowledgeBase(self):
         """
-        Make a copy of the current knowledge base and iterate through each clue. For each clue, retrieve the known safes
-        & known mines. Iterate through each set, and update it with the union of both and remove it from the knowledge
-        base.
+        Take clues off the worklist of the knowledge base until it is empty. For each clue, retrieve the known safes
+        & known mines. Known safes are added to safeSet and known mines are marked, and the clue is removed from the
+        knowledge base. Marking a mine shrinks the clues that contain it, which puts them back on the worklist, so only
+        the clues affected by a change are ever looked at again.
         """
 
-        # make a copy of the current knowledge base
-        GoThroughClues = self.knowledgeBase.copy()
+        while True:
+            clue = self.knowledgeBase.PopWork()  # Queries the next clue waiting on the worklist
+            if clue is None:
+                break
 
-        for clue in GoThroughClues:  # Queries all the clues in the knowledge base
             # call known_safes function from the Clue class, returns set of safe cells and stores in known_safes
             SafesQueried = clue.SafesKnown()
             # call known_mines function from the Clue class, returns set of mine cells and stores in known_mines
             MinesQueried = clue.MinesKnown()
 
             if SafesQueried:
-                self.safeSet.update(SafesQueried)  # Add to safeSet
+                for safe in SafesQueried:
+                    if self.cellGrid.add(safe, CellGrid.SAFE):  # Add to safeSet, and queue the cells that are new
+                        self.safeQueue.append(safe)
+                if self.traceLevel >= Trace.MARKS:
+                    for safe in SafesQueried:
+                        self.tracer.emit("safe", cell=safe)
                 self.knowledgeBase.remove(clue)  # remove clue from the knowledge base
 
-            if MinesQueried:
+            elif MinesQueried:
                 self.knowledgeBase.remove(clue)  # remove clue from knowledge base
-                for mine in MinesQueried.union(self.mineSet):
-                    # if there is an overlap between known_mines and self.mines, mark the mine
+                for mine in MinesQueried:
                     self.MarkMine(mine)
 
+            elif not clue.cells:
+                self.knowledgeBase.remove(clue)  # nothing left to learn from an empty clue
+
         return self.knowledgeBase
 
+    def traceState(self):
+        """
+        Report the whole knowledge base, the confirmed safe cells and the confirmed mine cells to the tracer
+        """
+        self.tracer.emit("state",
+                         knowledgeBase=[{"cells": Trace.cells(clue.cells), "count": clue.count}
+                                        for clue in self.knowledgeBase],
+                         safeSet=Trace.cells(self.safeSet),
+                         mineSet=Trace.cells(self.mineSet))
+
     def FlagCells(self):
         """
         Return the set of all mines (mineSet) that have been identified up to current point
@@ -1,18 +1,24 @@
+import os
+import random
 import sys
-import time
 
 import BasicAgent
 import Environment
+import MoveLog
+import Renderer
+import Trace
 import pygame
 
 HEIGHT = 50
 WIDTH = 50
 MINES = 100
 
+# Directory to save the move log of every game to, to be played again with Replay.py (None to not record)
+RECORD = None
+
 # Colors
 MAGENTA = (255, 0, 255)
 BLACK = (0, 0, 0)
-GRAY = (180, 180, 180)
 WHITE = (255, 255, 255)
 
 # Create game
@@ -39,9 +45,14 @@ flag = pygame.transform.scale(flag, (cell_size, cell_size))
 mine = pygame.image.load("assets/images/AzimIsTheMine.png")
 mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
-# Create game and AI agent
-game = Environment.Environment(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = BasicAgent.BasicAgent(height=HEIGHT, width=WIDTH)
+# Report the AI's moves in the terminal (use Trace.STATE to also see the knowledge base after every move)
+tracer = Trace.Tracer(level=Trace.MOVES, echo=True)
+
+# Create game and AI agent. The seed is picked here so that the game can be recorded
+seed = random.getrandbits(64)
+game = Environment.Environment(height=HEIGHT, width=WIDTH, mines=MINES, seed=seed)
+ai = BasicAgent.BasicAgent(height=HEIGHT, width=WIDTH, tracer=tracer)
+log = MoveLog.MoveLog("basic", HEIGHT, WIDTH, MINES, seed)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
@@ -54,212 +65,226 @@ instructions = True
 # Keep track of triggered mines
 triggered_mines = []
 
+# The board is drawn by a renderer that caches the cell images and only redraws the cells that change
+renderer = Renderer.BoardRenderer(HEIGHT, WIDTH, board_origin, cell_size, smallFont, flag, mine)
+
+# Cap the frame rate: between frames the loop sleeps on the clock instead of polling the mouse
+FPS = 30
+clock = pygame.time.Clock()
+
+# Play game button
+playButton = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
+
+# TYPE OF AGENT
+agentTypeRect = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 200,
+    (width / 3) - BOARD_PADDING * 2, 50)
+
+# TOTAL MINES
+totalMinesRect = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 150,
+    (width / 3) - BOARD_PADDING * 2, 50)
+
+# AI Move button
+aiButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+
+# Reset button
+resetButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+
+# Area of the "Lost"/"Won" text
+statusRect = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (2 / 3) * height - 25,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+
+
+def saveLog():
+    """
+    Save the moves of the current game to the RECORD directory, if recording is enabled and a move was made
+    """
+    if RECORD is not None and len(log):
+        os.makedirs(RECORD, exist_ok=True)
+        log.save(os.path.join(RECORD, f"basic-{log.header['seed']}.movelog"))
+
+
+def drawPanel():
+    """
+    Draw the labels and buttons to the right of the board. They never change, so this only happens when the whole
+    screen is redrawn.
+    """
+    for rect, label, color in (
+            (agentTypeRect, "Basic Agent", MAGENTA),
+            (totalMinesRect, "Total Mines: " + str(MINES), MAGENTA),
+            (aiButton, "AI Move", WHITE),
+            (resetButton, "Reset", WHITE)):
+        buttonText = mediumFont.render(label, True, BLACK)
+        buttonRect = buttonText.get_rect()
+        buttonRect.center = rect.center
+        pygame.draw.rect(screen, color, rect)
+        screen.blit(buttonText, buttonRect)
+
+
+# Whether the board and panel are on the screen, which status text is shown, and whether anything changed since the
+# screen was last drawn
+boardShown = False
+statusShown = None
+changed = True
+
 while True:
 
-    # Check if game quit
+    # Collect the clicks made since the last frame, and check if game quit
+    clicks = []
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            saveLog()
             sys.exit()
-
-    screen.fill(MAGENTA)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3):
+            clicks.append((event.button, event.pos))
 
     # Show game instructions
     if instructions:
 
-        # Title
-        title = largeFont.render("Play Minesweeper", True, WHITE)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
-
-        # Rules
-        rules = [
-            "Click a cell to reveal it.",
-            "Right-click a cell to mark it as a mine.",
-            "Mark all mines successfully to win!"
-        ]
-        for i, rule in enumerate(rules):
-            line = smallFont.render(rule, True, WHITE)
-            lineRect = line.get_rect()
-            lineRect.center = ((width / 2), 150 + 30 * i)
-            screen.blit(line, lineRect)
-
-        # Play game button
-        buttonRect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
-        buttonText = mediumFont.render("Play Game", True, BLACK)
-        buttonTextRect = buttonText.get_rect()
-        buttonTextRect.center = buttonRect.center
-        pygame.draw.rect(screen, WHITE, buttonRect)
-        screen.blit(buttonText, buttonTextRect)
+        if changed:
+            screen.fill(MAGENTA)
+
+            # Title
+            title = largeFont.render("Play Minesweeper", True, WHITE)
+            titleRect = title.get_rect()
+            titleRect.center = ((width / 2), 50)
+            screen.blit(title, titleRect)
+
+            # Rules
+            rules = [
+                "Click a cell to reveal it.",
+                "Right-click a cell to mark it as a mine.",
+                "Mark all mines successfully to win!"
+            ]
+            for i, rule in enumerate(rules):
+                line = smallFont.render(rule, True, WHITE)
+                lineRect = line.get_rect()
+                lineRect.center = ((width / 2), 150 + 30 * i)
+                screen.blit(line, lineRect)
+
+            # Play game button
+            buttonText = mediumFont.render("Play Game", True, BLACK)
+            buttonTextRect = buttonText.get_rect()
+            buttonTextRect.center = playButton.center
+            pygame.draw.rect(screen, WHITE, playButton)
+            screen.blit(buttonText, buttonTextRect)
+
+            pygame.display.flip()
+            changed = False
 
         # Check if play button clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if buttonRect.collidepoint(mouse):
+        for button, mouse in clicks:
+            if button == 1 and playButton.collidepoint(mouse):
                 instructions = False
-                time.sleep(0.3)
+                changed = True
 
-        pygame.display.flip()
+        clock.tick(FPS)
         continue
 
-    # Draw board
-    cells = []
-    for i in range(HEIGHT):
-        row = []
-        for j in range(WIDTH):
-
-            # Draw rectangle for cell
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size, cell_size
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            # Add a mine, flag, or number if needed
-            if game.is_mine((i, j)) and lost:  # and ai_trigger == (i,j):
-                screen.blit(mine, rect)
-            elif (i, j) in flags:
-                # display triggered mine
-                if (i, j) in triggered_mines:
-                    screen.blit(mine, rect)
+    # Draw the whole screen once after the instructions, then only what changes
+    if not boardShown:
+        screen.fill(MAGENTA)
+        drawPanel()
+        renderer.draw(screen)
+        pygame.display.flip()
+        boardShown = True
+        statusShown = None
+
+    for button, mouse in clicks:
+        move = None
+        changed = True
+
+        # Check for a right-click to toggle flagging
+        if button == 3 and not lost:
+            cell = renderer.cellAt(mouse)
+            if cell is not None and cell not in revealed:
+                if cell in flags:
+                    flags.remove(cell)
                 else:
-                    screen.blit(flag, rect)
-            elif (i, j) in revealed:
-                neighbors = smallFont.render(
-                    str(game.mineNeighbor((i, j))),
-                    True, BLACK
-                )
-                neighborsTextRect = neighbors.get_rect()
-                neighborsTextRect.center = rect.center
-                screen.blit(neighbors, neighborsTextRect)
-
-            row.append(rect)
-        cells.append(row)
-
-    #TYPE OF AGENT
-    AgentType = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 200,
-        (width / 3) - BOARD_PADDING * 2, 50)
-    buttonText = mediumFont.render("Basic Agent", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = AgentType.center
-    pygame.draw.rect(screen, MAGENTA, AgentType)
-    screen.blit(buttonText, buttonRect)
-
-    #TOTAL MINES
-    AgentType = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 150,
-        (width / 3) - BOARD_PADDING * 2, 50)
-    buttonText = mediumFont.render("Total Mines: " + str(MINES), True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = AgentType.center
-    pygame.draw.rect(screen, MAGENTA, AgentType)
-    screen.blit(buttonText, buttonRect)
-
-    # AI Move button
-    aiButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = aiButton.center
-    pygame.draw.rect(screen, WHITE, aiButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Reset button
-    resetButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("Reset", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = resetButton.center
-    pygame.draw.rect(screen, WHITE, resetButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
-    text = mediumFont.render(text, True, WHITE)
-    textRect = text.get_rect()
-    textRect.center = ((5 / 6) * width, (2 / 3) * height)
-    screen.blit(text, textRect)
-
-    move = None
-
-    left, _, right = pygame.mouse.get_pressed()
-
-    # Check for a right-click to toggle flagging
-    if right == 1 and not lost:
-        mouse = pygame.mouse.get_pos()
-        for i in range(HEIGHT):
-            for j in range(WIDTH):
-                if cells[i][j].collidepoint(mouse) and (i, j) not in revealed:
-                    if (i, j) in flags:
-                        flags.remove((i, j))
-                    else:
-                        flags.add((i, j))
-                    time.sleep(0.2)
+                    flags.add(cell)
 
-    elif left == 1:
-        mouse = pygame.mouse.get_pos()
+        elif button == 1:
 
-        # If AI button clicked, make an AI move
-        if aiButton.collidepoint(mouse) and not lost:
-            move = ai.move_safely()
-            if move is None:
-                move = ai.move_randomly()
+            # If AI button clicked, make an AI move
+            if aiButton.collidepoint(mouse) and not lost:
+                move = ai.move_safely()
                 if move is None:
-                    flags = ai.mineSet.copy()
-                    print("No moves left to make.")
+                    move = ai.move_randomly()
+                    if move is None:
+                        flags = ai.mineSet.copy()
+                        print("No moves left to make.")
+                    else:
+                        print("No known safe moves, AI making random move.")
                 else:
-                    print("No known safe moves, AI making random move.")
+                    print("AI making safe move.")
+                # Added Code to Update Flags in RealTime
+                for ai_mine in ai.FlagCells():
+                    flags.add(ai_mine)
+
+            # Reset game state
+            elif resetButton.collidepoint(mouse):
+                saveLog()
+                seed = random.getrandbits(64)
+                game = Environment.Environment(height=HEIGHT, width=WIDTH, mines=MINES, seed=seed)
+                ai = BasicAgent.BasicAgent(height=HEIGHT, width=WIDTH, tracer=tracer)
+                log = MoveLog.MoveLog("basic", HEIGHT, WIDTH, MINES, seed)
+                revealed = set()
+                flags = set()
+                lost = False
+
+            # User-made move
+            elif not lost:
+                cell = renderer.cellAt(mouse)
+                if cell is not None and cell not in flags and cell not in revealed:
+                    move = cell
+
+        # Make move and update AI knowledge
+        if move:
+            if game.is_mine(move):
+                # lost = True
+                ai.MarkMine(move)
+                triggered_mines.append(move)
+                log.mine(move)
+                # revealed.add(move)
+                print(move)
+                print("Mine Triggered")
+
             else:
-                print("AI making safe move.")
-            # Added Code to Update Flags in RealTime
-            for ai_mine in ai.FlagCells():
-                flags.add(ai_mine)
-            time.sleep(0.2)
-
-            # for game.mines in ai.movesmade():
-            #     mines.add(game.mines)
-            # time.sleep(0.2)
-
-        # Reset game state
-        elif resetButton.collidepoint(mouse):
-            game = Environment.Environment(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = BasicAgent.BasicAgent(height=HEIGHT, width=WIDTH)
-            revealed = set()
-            flags = set()
-            lost = False
-            continue
-
-        # User-made move
-        elif not lost:
-            for i in range(HEIGHT):
-                for j in range(WIDTH):
-                    if (cells[i][j].collidepoint(mouse)
-                            and (i, j) not in flags
-                            and (i, j) not in revealed):
-                        move = (i, j)
-
-    # Make move and update AI knowledge
-    if move:
-        if game.is_mine(move):
-            # lost = True
-            ai.MarkMine(move)
-            triggered_mines.append(move)
-            # revealed.add(move)
-            print(move)
-            print("Mine Triggered")
-
-
-        else:
-            nearby = game.mineNeighbor(move)
-            revealed.add(move)
-            ai.add_knowledge(move, nearby)
-
-    pygame.display.flip()
\ No newline at end of file
+                # Revealing a cell without neighboring mines opens the whole empty region around it at once. The AI
+                # may reveal a cell the user flagged, which takes the flag off
+                flags.discard(move)
+                opened = game.floodReveal(move, revealed, flags)
+                revealed.update(cell for cell, _ in opened)
+                ai.add_knowledge_many(opened)
+                log.reveal(move, opened)
+
+    # Redraw only when a click changed something
+    if changed:
+        changed = False
+
+        # Draw board
+        dirty = renderer.update(screen, game, revealed, flags, triggered_mines, lost)
+
+        # Display text
+        text = "Lost" if lost else "Won" if game.mines == flags else ""
+        if text != statusShown:
+            statusShown = text
+            pygame.draw.rect(screen, MAGENTA, statusRect)
+            text = mediumFont.render(text, True, WHITE)
+            textRect = text.get_rect()
+            textRect.center = ((5 / 6) * width, (2 / 3) * height)
+            screen.blit(text, textRect)
+            dirty.append(statusRect)
+
+        pygame.display.update(dirty)
+
+    clock.tick(FPS)
@@ -0,0 +1,199 @@
+import argparse
+import time
+
+import numpy as np
+
+# Outcomes of a move, as returned by BatchEnvironment.step
+MINE = -1  # the move triggered a mine
+NOTHING = 0  # the cell was already revealed (or its board was finished), nothing happened
+SAFE = 1  # the move revealed a safe cell
+
+# Values of the observation grid for cells that show no clue
+HIDDEN = -1
+TRIGGERED = -2
+
+
+class BatchEnvironment():
+    """
+    Many Minesweeper boards of the same size played side by side, for agents (or learned policies) that pick one move
+    per board at a time. Boards, clues and what has been revealed are stacked numpy arrays of shape
+    (count, height, width), and step() plays one move on every board with array operations only.
+    Board i is generated exactly like Environment(height, width, mines, seed=s) for its current seed s. Its first seed
+    is seeds[i] (i by default), and every time it is finished and reset, its seed grows by count, so the boards of a
+    batch play the seeds i, i + count, i + 2 * count, ... without ever repeating one.
+    A board is finished once all its safe cells are revealed (a win), or as soon as a mine is triggered with
+    endOnMine (a loss; without it, the game goes on like in the gameplay scripts and is won if no mine was triggered).
+    With autoReset, finished boards are replaced by fresh ones at the end of step(). Without it, they stay finished
+    (every move on them is NOTHING and never finishes the game again) until reset() is called on them.
+    The revealed mask and the observation grid (the clue of every revealed cell, HIDDEN or TRIGGERED otherwise) are
+    exposed as read-only views of the arrays the batch updates in place, so reading them never copies.
+    """
+
+    def __init__(self, count, height=9, width=9, mines=10, seeds=None, endOnMine=True, autoReset=True, flood=True):
+        if not 0 <= mines <= height * width:
+            raise ValueError(f"Cannot place {mines} mines on a {height}x{width} board")
+        self.count = count
+        self.height = height
+        self.width = width
+        self.mines = mines
+        self.endOnMine = endOnMine
+        self.autoReset = autoReset
+        self.flood = flood
+
+        self.seeds = np.arange(count, dtype=np.int64) if seeds is None else np.array(seeds, dtype=np.int64)
+        self.boards = np.zeros((count, height, width), dtype=bool)
+        self.clues = np.zeros((count, height, width), dtype=np.uint8)
+        self._revealed = np.zeros((count, height, width), dtype=bool)
+        self._observation = np.full((count, height, width), HIDDEN, dtype=np.int8)
+        self.safeLeft = np.zeros(count, dtype=np.int64)  # safe cells of each board that are still hidden
+        self.triggered = np.zeros(count, dtype=np.int64)  # mines triggered on each board
+        self.finished = np.zeros(count, dtype=bool)  # boards whose game is over, until they are reset
+
+        self.revealed = self._revealed.view()
+        self.revealed.flags.writeable = False
+        self.observation = self._observation.view()
+        self.observation.flags.writeable = False
+
+        # Totals over every finished game
+        self.games = 0
+        self.wins = 0
+
+        self.reset(np.arange(count))
+
+    def reset(self, boards):
+        """
+        Generate fresh boards from the current seeds of the given board indices, and hide all their cells
+        """
+        cells = self.height * self.width
+        for i in boards:
+            rng = np.random.default_rng(int(self.seeds[i]))
+            board = np.zeros(cells, dtype=bool)
+            if self.mines <= cells - self.mines:
+                board[rng.choice(cells, self.mines, replace=False, shuffle=False)] = True
+            else:
+                board[:] = True
+                board[rng.choice(cells, cells - self.mines, replace=False, shuffle=False)] = False
+            self.boards[i] = board.reshape(self.height, self.width)
+
+        padded = np.pad(self.boards[boards], ((0, 0), (1, 1), (1, 1))).astype(np.uint8)
+        clues = np.zeros((len(boards), self.height, self.width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    clues += padded[:, di:di + self.height, dj:dj + self.width]
+        self.clues[boards] = clues
+        self._revealed[boards] = False
+        self._observation[boards] = HIDDEN
+        self.safeLeft[boards] = cells - self.mines
+        self.triggered[boards] = 0
+        self.finished[boards] = False
+
+    def dilate(self, mask):
+        """
+        Returns the cells of each board that are next to (or are) a cell of the mask
+        """
+        padded = np.pad(mask, ((0, 0), (1, 1), (1, 1)))
+        grown = np.zeros_like(mask)
+        for di in range(3):
+            for dj in range(3):
+                grown |= padded[:, di:di + self.height, dj:dj + self.width]
+        return grown
+
+    def floodFill(self, boards, rows, cols):
+        """
+        Open the empty regions around the given zero-clue cells (one per board), like Environment.floodReveal, on all
+        the boards at once. Every round opens the hidden cells next to the zero cells opened in the previous round.
+        """
+        revealed = self._revealed[boards]
+        mines = self.boards[boards]
+        zero = self.clues[boards] == 0
+        opened = np.zeros_like(revealed)
+        opened[np.arange(len(boards)), rows, cols] = True
+        frontier = opened
+        while frontier.any():
+            frontier = self.dilate(frontier & zero) & ~revealed & ~mines & ~opened
+            opened |= frontier
+        return opened
+
+    def step(self, moves):
+        """
+        Play one move on every board. moves holds a (row, column) pair or a linear cell index per board.
+        Returns three arrays with an entry per board: the outcome (MINE, NOTHING or SAFE), the clue of the cell played
+        (-1 unless it was SAFE), and whether the move finished the game. With autoReset the finished boards are already
+        replaced when step returns, and their observation shows the fresh board.
+        """
+        moves = np.asarray(moves)
+        if moves.ndim == 2:
+            rows, cols = moves[:, 0], moves[:, 1]
+        else:
+            rows, cols = np.divmod(moves, self.width)
+        boards = np.arange(self.count)
+
+        fresh = ~self._revealed[boards, rows, cols] & (self._observation[boards, rows, cols] != TRIGGERED)
+        fresh &= ~self.finished
+        mine = fresh & self.boards[boards, rows, cols]
+        safe = fresh & ~mine
+        outcome = np.where(mine, MINE, np.where(safe, SAFE, NOTHING)).astype(np.int8)
+        clue = np.where(safe, self.clues[boards, rows, cols], -1).astype(np.int8)
+
+        self._observation[boards[mine], rows[mine], cols[mine]] = TRIGGERED
+        self.triggered += mine
+
+        # Reveal the safe cells, and open the empty regions around the zero clues
+        if self.flood:
+            zero = safe & (clue == 0)
+            if zero.any():
+                opened = self.floodFill(boards[zero], rows[zero], cols[zero])
+                self._revealed[zero] |= opened
+                self.safeLeft[zero] -= np.count_nonzero(opened, axis=(1, 2))
+                self._observation[zero] = np.where(self._revealed[zero], self.clues[zero], self._observation[zero])
+            safe = safe & ~zero
+        self._revealed[boards[safe], rows[safe], cols[safe]] = True
+        self._observation[boards[safe], rows[safe], cols[safe]] = clue[safe]
+        self.safeLeft -= safe
+
+        done = ((self.safeLeft == 0) | (mine if self.endOnMine else False)) & ~self.finished
+        self.finished |= done
+        if done.any():
+            finished = np.flatnonzero(done)
+            self.games += len(finished)
+            self.wins += int(np.count_nonzero(self.triggered[finished] == 0))
+            if self.autoReset:
+                self.seeds[finished] += self.count
+                self.reset(finished)
+        return outcome, clue, done
+
+
+def randomMoves(batch, rng):
+    """
+    Pick a uniformly random hidden cell on every board, as linear cell indices
+    """
+    keys = rng.random((batch.count, batch.height * batch.width))
+    keys[batch.observation.reshape(batch.count, -1) != HIDDEN] = -1.0
+    return keys.argmax(axis=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many boards at once with random moves and report throughput")
+    parser.add_argument("--boards", type=int, default=1024)
+    parser.add_argument("--height", type=int, default=9)
+    parser.add_argument("--width", type=int, default=9)
+    parser.add_argument("--mines", type=int, default=10)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--keep-going", action="store_true", help="keep playing a board after it triggers a mine")
+    args = parser.parse_args(argv)
+
+    batch = BatchEnvironment(args.boards, args.height, args.width, args.mines, endOnMine=not args.keep_going)
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        batch.step(randomMoves(batch, rng))
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.boards} boards of {args.height}x{args.width} with {args.mines} mines, {args.steps} steps")
+    print(f"\tMoves per second:  {args.boards * args.steps / elapsed:.0f}")
+    print(f"\tGames per second:  {batch.games / elapsed:.0f} ({batch.games} games, {batch.wins} won)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import Environment
+import Simulation
+
+# Named scenarios: (height, width, mines, number of games). Seeds run from 0 to games - 1.
+SCENARIOS = {
+    "beginner": (9, 9, 10, 50),
+    "intermediate": (16, 16, 40, 50),
+    "expert": (16, 30, 99, 50),
+    "default": (50, 50, 100, 10),
+    "stress-200": (200, 200, 1600, 2),
+    "stress-1000": (1000, 1000, 40000, 1),
+}
+
+# Metrics where a larger value is better; every other metric is a cost
+HIGHER_IS_BETTER = {"win_rate"}
+
+
+def timeGame(agent, height, width, mines, seed):
+    """
+    Play one game like Simulation.playGame, timing every move and every call to add_knowledge_many.
+    Returns (won, moves, cells given to add_knowledge, seconds in add_knowledge, game seconds).
+    """
+    random.seed(seed)
+    ai = Simulation.makeAgent(agent, height, width)
+    game = Environment.Environment(height=height, width=width, mines=mines, seed=seed)
+
+    revealed = set()
+    triggered_mines = set()
+    moves = cells = 0
+    knowledge = 0.0
+
+    start = time.perf_counter()
+    while True:
+        move = Simulation.chooseMove(ai)
+        if move is None:
+            break
+        if move in revealed or move in triggered_mines:
+            continue
+
+        moves += 1
+        if game.is_mine(move):
+            ai.MarkMine(move)
+            triggered_mines.add(move)
+        else:
+            opened = game.floodReveal(move, revealed)
+            revealed.update(cell for cell, _ in opened)
+            before = time.perf_counter()
+            ai.add_knowledge_many(opened)
+            knowledge += time.perf_counter() - before
+            cells += len(opened)
+    elapsed = time.perf_counter() - start
+    return len(triggered_mines) == 0, moves, cells, knowledge, elapsed
+
+
+def peakMemory(function, *args):
+    """
+    Run the function under tracemalloc and return the peak memory it allocated, in MB. Tracing slows everything down,
+    so this is kept apart from the timed runs.
+    """
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def benchAgent(agent, height, width, mines, seeds):
+    """
+    Benchmark one agent on a scenario: win rate, time per add_knowledge (per revealed cell), time per move, mean game
+    time and the peak memory of the first game
+    """
+    wins = moves = cells = 0
+    knowledge = seconds = 0.0
+    for seed in seeds:
+        won, played, given, spent, elapsed = timeGame(agent, height, width, mines, seed)
+        wins += won
+        moves += played
+        cells += given
+        knowledge += spent
+        seconds += elapsed
+
+    return {
+        "games": len(seeds),
+        "win_rate": wins / len(seeds),
+        "moves": moves,
+        "add_knowledge_us": 1e6 * knowledge / cells if cells else 0.0,
+        "move_us": 1e6 * seconds / moves if moves else 0.0,
+        "game_ms": 1000 * seconds / len(seeds),
+        "peak_memory_mb": peakMemory(timeGame, agent, height, width, mines, seeds[0]),
+    }
+
+
+def benchEnvironment(height, width, mines, seeds, probes=10000):
+    """
+    Benchmark the Environment on a scenario: board generation, is_mine and mineNeighbor lookups on random cells, and
+    the peak memory of building one board
+    """
+    build = lookup = neighbor = 0.0
+    for seed in seeds:
+        start = time.perf_counter()
+        game = Environment.Environment(height=height, width=width, mines=mines, seed=seed)
+        build += time.perf_counter() - start
+
+        rng = random.Random(seed)
+        cells = [(rng.randrange(height), rng.randrange(width)) for _ in range(probes)]
+        start = time.perf_counter()
+        for cell in cells:
+            game.is_mine(cell)
+        lookup += time.perf_counter() - start
+        start = time.perf_counter()
+        for cell in cells:
+            game.mineNeighbor(cell)
+        neighbor += time.perf_counter() - start
+
+    lookups = probes * len(seeds)
+    return {
+        "build_ms": 1000 * build / len(seeds),
+        "is_mine_us": 1e6 * lookup / lookups,
+        "mine_neighbor_us": 1e6 * neighbor / lookups,
+        "peak_memory_mb": peakMemory(Environment.Environment, height, width, mines, seeds[0]),
+    }
+
+
+def runScenario(name, agents, games=None):
+    height, width, mines, count = SCENARIOS[name]
+    seeds = list(range(games or count))
+    result = {
+        "board": {"height": height, "width": width, "mines": mines},
+        "seeds": [seeds[0], seeds[-1] + 1],
+        "environment": benchEnvironment(height, width, mines, seeds),
+    }
+    for agent in agents:
+        result[agent] = benchAgent(agent, height, width, mines, seeds)
+    return result
+
+
+def compare(results, baseline, tolerance, winTolerance):
+    """
+    Compare two benchmark runs metric by metric. A cost regresses when it grows by more than tolerance (a fraction of
+    the baseline value); the win rate regresses when it drops by more than winTolerance. Scenarios or subjects missing
+    from either run are skipped. Returns the list of regressions as (scenario, subject, metric, baseline, current).
+    """
+    regressions = []
+    for name, scenario in results["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None or before["board"] != scenario["board"]:
+            continue
+        for subject, metrics in scenario.items():
+            if subject in ("board", "seeds") or subject not in before:
+                continue
+            for metric, value in metrics.items():
+                old = before[subject].get(metric)
+                if old is None or metric == "games" or metric == "moves":
+                    continue
+                if metric in HIGHER_IS_BETTER:
+                    worse = value < old - winTolerance
+                else:
+                    worse = value > old * (1 + tolerance)
+                if worse:
+                    regressions.append((name, subject, metric, old, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the agents and the environment on fixed scenarios")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--agent", nargs="+", choices=sorted(Simulation.AGENTS), default=sorted(Simulation.AGENTS))
+    parser.add_argument("--games", type=int, default=None, help="games per scenario (default: per-scenario count)")
+    parser.add_argument("--output", default=None, help="write the results as JSON to this file")
+    parser.add_argument("--compare", default=None, help="baseline JSON file to check the results against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="fraction by which a time or memory metric may grow before it is a regression")
+    parser.add_argument("--win-tolerance", type=float, default=0.05,
+                        help="drop in win rate before it is a regression")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "scenarios": {},
+    }
+    for name in args.scenarios:
+        scenario = runScenario(name, args.agent, args.games)
+        results["scenarios"][name] = scenario
+        board = scenario["board"]
+        print(f"{name} ({board['height']}x{board['width']}, {board['mines']} mines):")
+        for subject, metrics in scenario.items():
+            if subject not in ("board", "seeds"):
+                print(f"\t{subject:<12} " + ", ".join(f"{metric}={value:.4g}" for metric, value in metrics.items()))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance, args.win_tolerance)
+        for name, subject, metric, old, value in regressions:
+            print(f"REGRESSION {name} {subject} {metric}: {old:.4g} -> {value:.4g}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against " + args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import collections.abc
+
+import numpy as np
+
+# Flags of a cell in the grid. A cell nothing is known about is 0
+SAFE = 1  # known to be safe
+MINE = 2  # known to be a mine
+REVEALED = 4  # played, and its clue is known
+
+
+class CellGrid():
+    """
+    What an agent knows about every cell of the board, as a single byte per cell holding the SAFE, MINE and REVEALED
+    flags. The bytes live in a bytearray, which is the fastest to index one cell at a time, and grid is a numpy view of
+    the same memory for whole-board operations. The number of cells with each flag is kept up to date, so the sets of
+    cells read through view() know their size without scanning the board.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+
+        self.cells = bytearray(height * width)  # flags of the cell with linear index row * width + column
+        self.grid = np.frombuffer(self.cells, dtype=np.uint8).reshape(height, width)
+        self.counts = {SAFE: 0, MINE: 0, REVEALED: 0}
+
+    def load(self, cells):
+        """
+        Take over the flags of every cell from a writable buffer of height * width bytes (such as a memoryview of a
+        mapped snapshot). Views of the grid keep working, and only the flag counts are recomputed.
+        """
+        self.cells = cells
+        self.grid = np.frombuffer(cells, dtype=np.uint8).reshape(self.height, self.width)
+        self.counts = {flag: int(np.count_nonzero(self.grid & flag)) for flag in self.counts}
+
+    def has(self, cell, flag):
+        """
+        Returns True if the cell has the flag
+        """
+        return bool(self.cells[cell[0] * self.width + cell[1]] & flag)
+
+    def add(self, cell, flag):
+        """
+        Give the cell the flag. Returns True if it did not have it yet.
+        """
+        index = cell[0] * self.width + cell[1]
+        if self.cells[index] & flag:
+            return False
+        self.cells[index] |= flag
+        self.counts[flag] += 1
+        return True
+
+    def discard(self, cell, flag):
+        """
+        Take the flag off the cell, if it has it
+        """
+        index = cell[0] * self.width + cell[1]
+        if self.cells[index] & flag:
+            self.cells[index] &= ~flag
+            self.counts[flag] -= 1
+
+    def view(self, flag):
+        """
+        Returns a read-only set of the (row, column) cells that have the flag, which follows later changes to the grid
+        """
+        return CellView(self, flag)
+
+
+class CellView(collections.abc.Set):
+    """
+    The cells of a CellGrid that have one flag, read as a set of (row, column) tuples. Membership and size take
+    constant time; iterating scans the whole grid, so it is meant for displaying and tracing rather than for inference.
+    """
+
+    def __init__(self, grid, flag):
+        self.grid = grid
+        self.flag = flag
+
+    def __contains__(self, cell):
+        try:
+            i, j = cell
+        except (TypeError, ValueError):
+            return False
+        grid = self.grid
+        return 0 <= i < grid.height and 0 <= j < grid.width and bool(grid.cells[i * grid.width + j] & self.flag)
+
+    def __len__(self):
+        return self.grid.counts[self.flag]
+
+    def __iter__(self):
+        rows, cols = np.nonzero(self.grid.grid & self.flag)
+        return zip(rows.tolist(), cols.tolist())
+
+    def __repr__(self):
+        return f"{set(self)}"
+
+    def copy(self):
+        """
+        Returns a plain set of the cells, which does not change with the grid
+        """
+        return set(self)
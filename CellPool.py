@@ -0,0 +1,69 @@
+import array
+import random
+
+import numpy as np
+
+
+class CellPool():
+    """
+    The cells of a board that are still unknown (not played and not known to be mines), kept so that removing a cell
+    and picking a uniformly random cell both take constant time.
+    The pool is an array of linear cell indices (row * width + column) with removal by swapping the last entry into the
+    freed slot, and a second array giving the position of every cell in the first one (-1 once a cell has been
+    removed). Both are flat machine-integer arrays, four bytes per cell on boards of up to 2**31 cells.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.size = height * width
+
+        typecode, dtype = ("i", np.int32) if self.size < 2 ** 31 else ("q", np.int64)
+        identity = np.arange(self.size, dtype=dtype).tobytes()
+        self.items = array.array(typecode, identity)  # position -> cell index
+        self.positions = array.array(typecode, identity)  # cell index -> position
+
+    def load(self, size, items, positions):
+        """
+        Take over the state of a pool from its size and its two index arrays, given as writable buffers of
+        height * width integers (such as memoryviews of a mapped snapshot)
+        """
+        self.size = size
+        self.items = items
+        self.positions = positions
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, cell):
+        i, j = cell
+        return 0 <= i < self.height and 0 <= j < self.width and self.positions[i * self.width + j] >= 0
+
+    def __iter__(self):
+        for position in range(self.size):
+            yield divmod(self.items[position], self.width)
+
+    def discard(self, cell):
+        """
+        Remove the cell from the pool, if it is still there
+        """
+        index = cell[0] * self.width + cell[1]
+        position = self.positions[index]
+        if position < 0:
+            return
+
+        # Move the last cell of the pool into the freed position
+        last = self.size - 1
+        moved = self.items[last]
+        self.items[position] = moved
+        self.positions[moved] = position
+        self.positions[index] = -1
+        self.size -= 1
+
+    def choice(self, rng=random):
+        """
+        Returns a cell picked uniformly at random from the pool, or None if the pool is empty
+        """
+        if self.size == 0:
+            return None
+        return divmod(self.items[rng.randrange(self.size)], self.width)
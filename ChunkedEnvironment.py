@@ -0,0 +1,187 @@
+import collections
+import random
+
+import numpy as np
+
+import Environment
+
+
+class ChunkedEnvironment(Environment.Environment):
+    """
+    Minesweeper game representation for boards far too large to hold in memory.
+    The board is split into square chunks of chunkSize x chunkSize cells. A chunk's mines are only generated when one of
+    its cells is first looked at, and chunks are dropped again (least recently used first) once they take more than
+    memoryBudget bytes. Everything is derived from the seed, so a dropped chunk comes back exactly as it was and memory
+    grows with the area explored, not with the size of the board.
+    The number of mines of each chunk is drawn by splitting the total number of mines in halves, over the chunk rows and
+    then over the chunks of a row, with one hypergeometric draw per split. This takes O(log chunks) draws per chunk and
+    places exactly the requested number of mines on the whole board, uniformly at random like Environment does.
+    The chunked board does not support safeCell. The mines property and clueGrid() build the whole board and are only
+    meant for boards that fit in memory.
+    """
+
+    def __init__(self, height=50, width=50, mines=100, seed=None, chunkSize=64, memoryBudget=64 * 2 ** 20):
+        self.height = height
+        self.width = width
+        self.mineCount = mines
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        if not 0 <= mines <= height * width:
+            raise ValueError(f"Cannot place {mines} mines on a {height}x{width} board")
+
+        self.chunkSize = chunkSize
+        self.chunkRows = -(-height // chunkSize)
+        self.chunkCols = -(-width // chunkSize)
+
+        # (chunk row, chunk column) -> [mine mask, clue counts or None until needed], least recently used first. Each
+        # chunk takes at most two bytes per cell, and at least the 3x3 chunks around a cell must fit to count its clue
+        self.chunks = collections.OrderedDict()
+        self.maxChunks = max(9, memoryBudget // (2 * chunkSize * chunkSize))
+        self.chunksGenerated = 0  # number of times a chunk was generated, including regenerations after eviction
+
+        self._mines = None
+
+        # Maintain a set of mines that is found by the player
+        self.mines_found = set()  # initially this set is empty
+
+    def chunkShape(self, ci, cj):
+        """
+        Returns the number of rows and columns of the chunk, which is smaller than chunkSize along the bottom and right
+        edges of the board
+        """
+        return (min(self.chunkSize, self.height - ci * self.chunkSize),
+                min(self.chunkSize, self.width - cj * self.chunkSize))
+
+    def chunkMineCount(self, ci, cj):
+        """
+        Returns the number of mines in the chunk, drawn by splitting the mines of the board over halves of the chunk
+        rows and then over halves of the chunks of row ci
+        """
+        size = self.chunkSize
+
+        def rowCells(lo, hi):
+            return (min(hi * size, self.height) - lo * size) * self.width
+
+        def colCells(lo, hi):
+            return (min(ci * size + size, self.height) - ci * size) * (min(hi * size, self.width) - lo * size)
+
+        mines = self.narrow(self.mineCount, ci, self.chunkRows, rowCells, (0,))
+        return self.narrow(mines, cj, self.chunkCols, colCells, (1, ci))
+
+    def narrow(self, mines, target, units, cells, key):
+        """
+        Halve the range 0..units-1 towards the target unit, each time drawing how many of the mines of the range fall in
+        its first half (a hypergeometric draw seeded by the seed, key and range), and return the mines of the target.
+        """
+        lo, hi = 0, units
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            rng = np.random.default_rng([self.seed, *key, lo, hi])
+            first, second = cells(lo, mid), cells(mid, hi)
+            if max(first, second) < 10 ** 9:
+                left = int(rng.hypergeometric(first, second, mines)) if mines else 0
+            else:
+                # numpy's hypergeometric stops at 10**9 cells; at that size the binomial is practically the same
+                left = min(first, max(mines - second, int(rng.binomial(mines, first / (first + second)))))
+            if target < mid:
+                hi, mines = mid, left
+            else:
+                lo, mines = mid, mines - left
+        return mines
+
+    def chunk(self, ci, cj):
+        """
+        Returns the [mine mask, clues] entry of the chunk, generating it if it is not in memory
+        """
+        key = (ci, cj)
+        entry = self.chunks.get(key)
+        if entry is not None:
+            self.chunks.move_to_end(key)
+            return entry
+
+        rows, cols = self.chunkShape(ci, cj)
+        rng = np.random.default_rng([self.seed, 2, ci, cj])
+        board = np.zeros((rows, cols), dtype=bool)
+        board.flat[rng.choice(rows * cols, self.chunkMineCount(ci, cj), replace=False, shuffle=False)] = True
+        entry = [board, None]
+
+        self.chunks[key] = entry
+        self.chunksGenerated += 1
+        while len(self.chunks) > self.maxChunks:
+            self.chunks.popitem(last=False)
+        return entry
+
+    def window(self, top, left, rows, cols):
+        """
+        Returns the mine mask of a rectangle of the board, with False for the parts that lie outside of the board
+        """
+        mask = np.zeros((rows, cols), dtype=bool)
+        size = self.chunkSize
+        for ci in range(max(0, top // size), min(self.chunkRows, -(-(top + rows) // size))):
+            for cj in range(max(0, left // size), min(self.chunkCols, -(-(left + cols) // size))):
+                board = self.chunk(ci, cj)[0]
+                # overlap of the chunk and the rectangle, in board coordinates
+                r0, r1 = max(top, ci * size), min(top + rows, ci * size + board.shape[0])
+                c0, c1 = max(left, cj * size), min(left + cols, cj * size + board.shape[1])
+                mask[r0 - top:r1 - top, c0 - left:c1 - left] = board[r0 - ci * size:r1 - ci * size,
+                                                                     c0 - cj * size:c1 - cj * size]
+        return mask
+
+    def chunkClues(self, ci, cj):
+        """
+        Returns the clue counts of the chunk, counting them (across the chunk borders) the first time they are needed
+        """
+        entry = self.chunk(ci, cj)
+        if entry[1] is None:
+            rows, cols = entry[0].shape
+            padded = self.window(ci * self.chunkSize - 1, cj * self.chunkSize - 1, rows + 2, cols + 2).astype(np.uint8)
+            clues = np.zeros((rows, cols), dtype=np.uint8)
+            for di in range(3):
+                for dj in range(3):
+                    if (di, dj) != (1, 1):
+                        clues += padded[di:di + rows, dj:dj + cols]
+            entry = self.chunk(ci, cj)  # the window may have pushed it out of memory
+            entry[1] = clues
+        return entry[1]
+
+    @property
+    def mines(self):
+        """
+        The set of (row, column) mine cells of the whole board. Only meant for boards that fit in memory
+        """
+        if self._mines is None:
+            rows, cols = np.nonzero(self.window(0, 0, self.height, self.width))
+            self._mines = set(zip(rows.tolist(), cols.tolist()))
+        return self._mines
+
+    def is_mine(self, cell):
+        i, j = cell
+        ci, ri = divmod(i, self.chunkSize)
+        cj, rj = divmod(j, self.chunkSize)
+        return bool(self.chunk(ci, cj)[0][ri, rj])
+
+    def mineNeighbor(self, cell):
+        """
+        Returns the number of mines that are within one row and column of a given cell, not including the cell itself
+        """
+        i, j = cell
+        ci, ri = divmod(i, self.chunkSize)
+        cj, rj = divmod(j, self.chunkSize)
+        return int(self.chunkClues(ci, cj)[ri, rj])
+
+    def clueGrid(self):
+        """
+        Returns the height x width array holding the clue of every cell. Only meant for boards that fit in memory
+        """
+        padded = np.pad(self.window(0, 0, self.height, self.width), 1).astype(np.uint8)
+        clues = np.zeros((self.height, self.width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    clues += padded[di:di + self.height, dj:dj + self.width]
+        return clues
+
+    def memory(self):
+        """
+        Returns the number of bytes taken by the chunks currently in memory
+        """
+        return sum(board.nbytes + (0 if clues is None else clues.nbytes) for board, clues in self.chunks.values())
@@ -6,14 +6,20 @@ import random
 class Clue():
     """
     Each clue essentially contains a set of board cells as well as a count which indicates how many of those cells in
-    the set are mines
+    the set are mines. The key identifying the clue is computed once and kept until the clue changes.
     """
 
+    __slots__ = ("cells", "count", "_key")
+
     def __init__(self, cells, count):  # initialize the clue class with cells and a count representing number of
         # neighboring mines
 
         self.cells = set(cells)
         self.count = count
+        self._key = None
+
+    def __len__(self):
+        return len(self.cells)
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
@@ -48,6 +54,7 @@ class Clue():
         if cell in self.cells:
             self.cells.remove(cell)
             self.count -= 1
+            self._key = None
             return 1
         return 0
 
@@ -58,5 +65,171 @@ class Clue():
         """
         if cell in self.cells:
             self.cells.remove(cell)
+            self._key = None
+            return 1
+        return 0
+
+    def issubset(self, other):
+        """
+        Returns True if every cell of this clue is also a cell of the other clue
+        """
+        return self.cells.issubset(other.cells)
+
+    def difference(self, other):
+        """
+        Returns the clue left over when the other clue (a subset of this one) is taken out of it
+        """
+        return Clue(self.cells.difference(other.cells), self.count - other.count)
+
+    def key(self):
+        """
+        Returns a hashable value that identifies the clue: two clues are equal exactly when their keys are equal
+        """
+        if self._key is None:
+            self._key = frozenset(self.cells), self.count
+        return self._key
+
+
+class BitClue():
+    """
+    Same as Clue, but the cells are stored as an integer bitmask over the linear cell index (row * width + column),
+    so subset tests, differences and equality are single integer operations, and the clue is hashable.
+    Bit 0 of the mask stands for the cell with linear index self.base (the lowest index in the clue), which keeps the
+    masks as small as the area the clue covers instead of growing with the size of the board.
+    The cells attribute decodes the mask back into a set of (row, col) cells, for printing and for the gameplay.
+    """
+
+    __slots__ = ("width", "count", "base", "mask", "_cells")
+
+    def __init__(self, cells, count, width):
+        self.width = width
+        self.count = count
+        self.base = 0
+        self.mask = 0
+
+        indices = [i * width + j for i, j in cells]
+        if indices:
+            self.base = min(indices)
+            for index in indices:
+                self.mask |= 1 << (index - self.base)
+        self._cells = None
+
+    @classmethod
+    def fromMask(cls, base, mask, count, width):
+        """
+        Build a clue straight from a mask whose bit 0 stands for the linear index base
+        """
+        clue = cls((), count, width)
+        if mask:
+            shift = (mask & -mask).bit_length() - 1  # keep bit 0 on the lowest cell of the clue
+            clue.base = base + shift
+            clue.mask = mask >> shift
+        return clue
+
+    @property
+    def cells(self):
+        if self._cells is None:
+            cells = set()
+            mask = self.mask
+            while mask:
+                low = mask & -mask
+                cells.add(divmod(self.base + low.bit_length() - 1, self.width))
+                mask ^= low
+            self._cells = frozenset(cells)
+        return self._cells
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __eq__(self, other):
+        return self.base == other.base and self.mask == other.mask and self.count == other.count
+
+    def __hash__(self):
+        return hash((self.base, self.mask, self.count))
+
+    def __str__(self):
+        return f"{set(self.cells)} = {self.count}"
+
+    def aligned(self, other):
+        """
+        Returns the masks of both clues shifted so that bit 0 stands for the same linear index, and that index
+        """
+        base = min(self.base, other.base)
+        return self.mask << (self.base - base), other.mask << (other.base - base), base
+
+    def MinesKnown(self):
+        """
+        Returns a set of all cells in self.cells that are known to be mines, given that the length of the set is equal
+        to the clue count
+        """
+        if len(self) == self.count:
+            return set(self.cells)
+        else:
+            return set()
+
+    def SafesKnown(self):
+        """
+        Returns the set of all cells in self.cells known to be safe.
+        """
+        if self.count == 0:
+            return set(self.cells)
+        else:
+            return set()
+
+    def remove(self, cell):
+        """
+        Take the cell out of the mask. Returns 1 if the cell was part of the clue, 0 otherwise.
+        """
+        bit = cell[0] * self.width + cell[1] - self.base
+        if bit < 0 or not (self.mask >> bit) & 1:
+            return 0
+        self.mask ^= 1 << bit
+        if self.mask and bit == 0:
+            shift = (self.mask & -self.mask).bit_length() - 1
+            self.base += shift
+            self.mask >>= shift
+        if self._cells is not None:  # keep the decoded cells, they only lose this one
+            self._cells = self._cells - {cell}
+        return 1
+
+    def MarkMine(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be a mine.
+        """
+        if self.remove(cell):
+            self.count -= 1
             return 1
-        return 0
\ No newline at end of file
+        return 0
+
+    def MarkSafe(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be safe.
+        """
+        return self.remove(cell)
+
+    def issubset(self, other):
+        """
+        Returns True if every cell of this clue is also a cell of the other clue
+        """
+        shift = self.base - other.base
+        if shift < 0:  # the lowest cell of this clue comes before every cell of the other clue
+            return False
+        return (self.mask << shift) & ~other.mask == 0
+
+    def difference(self, other):
+        """
+        Returns the clue left over when the other clue (a subset of this one) is taken out of it
+        """
+        shift = other.base - self.base
+        if shift >= 0:
+            return BitClue.fromMask(self.base, self.mask & ~(other.mask << shift), self.count - other.count, self.width)
+        mine, theirs, base = self.aligned(other)
+        return BitClue.fromMask(base, mine & ~theirs, self.count - other.count, self.width)
+
+    def key(self):
+        """
+        Returns a hashable value that identifies the clue: two clues are equal exactly when their keys are equal
+        """
+        return self.base, self.mask, self.count
@@ -0,0 +1,76 @@
+import argparse
+import random
+import time
+
+import Environment
+import ImprovedAgent
+import Simulation
+
+
+def timeGame(height, width, mines, seed, bitmask):
+    """
+    Play one ImprovedAgent game and return the seconds spent in newInferences and in add_knowledge, and the number of
+    moves made
+    """
+    random.seed(seed)
+    game = Environment.Environment(height=height, width=width, mines=mines, seed=seed)
+    ai = ImprovedAgent.ImprovedAgent(height=height, width=width, bitmask=bitmask)
+
+    timings = {"newInferences": 0.0, "add_knowledge": 0.0}
+
+    def timed(name, function):
+        def wrapper(*args):
+            start = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                timings[name] += time.perf_counter() - start
+        return wrapper
+
+    ai.newInferences = timed("newInferences", ai.newInferences)
+    addKnowledge = timed("add_knowledge", ai.add_knowledge)
+
+    played = set()
+    while True:
+        move = Simulation.chooseMove(ai)
+        if move is None:
+            break
+        if move in played:
+            continue
+        played.add(move)
+        if game.is_mine(move):
+            ai.MarkMine(move)
+        else:
+            addKnowledge(move, game.mineNeighbor(move))
+    return timings["newInferences"], timings["add_knowledge"], len(played)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare ImprovedAgent inference time with set-based and bitmask clues")
+    parser.add_argument("--sizes", nargs="+", default=["50x50x100", "100x100x400"],
+                        help="boards as HEIGHTxWIDTHxMINES")
+    parser.add_argument("--games", type=int, default=3, help="games per board (seeds 0 to games-1)")
+    args = parser.parse_args(argv)
+
+    print(f"{'board':>14} {'clues':>8} {'moves':>7} {'newInferences':>14} {'add_knowledge':>14} {'inference speedup':>18}")
+    for size in args.sizes:
+        height, width, mines = (int(value) for value in size.split("x"))
+        results = {}
+        for bitmask in (False, True):
+            inference = knowledge = moves = 0
+            for seed in range(args.games):
+                seconds, total, played = timeGame(height, width, mines, seed, bitmask)
+                inference += seconds
+                knowledge += total
+                moves += played
+            results[bitmask] = (inference, knowledge, moves)
+
+        for bitmask in (False, True):
+            inference, knowledge, moves = results[bitmask]
+            speedup = f"{results[False][0] / inference:.2f}x" if bitmask else ""
+            print(f"{size:>14} {'bitmask' if bitmask else 'set':>8} {moves:>7} {inference:>13.3f}s {knowledge:>13.3f}s "
+                  f"{speedup:>18}")
+
+
+if __name__ == "__main__":
+    main()
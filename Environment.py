@@ -7,37 +7,89 @@ class Environment():
     Minesweeper game representation
     """
 
-    def __init__(self, height=50, width=50, mines=100):
+    def __init__(self, height=50, width=50, mines=100, seed=None, rng=None, safeCell=None):
         """"
-        Take in desired dimensions and a given number of mines to generate a board with randomly placed mines
+        Take in desired dimensions and a given number of mines to generate a board with randomly placed mines.
+        The mines are drawn from rng (a numpy.random.Generator), or from numpy.random.default_rng(seed) when a seed is
+        given, or else from a generator seeded by the global random module. The same seed always generates the same
+        board.
+        If safeCell is given, no mine is placed on that cell or its neighbors, so it can safely be revealed first.
         """
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
-
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly to the board
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+
+        if rng is None:
+            rng = np.random.default_rng(seed if seed is not None else random.getrandbits(64))
+
+        # Cells that must stay free of mines, as linear cell indices (row * width + column)
+        excluded = []
+        if safeCell is not None:
+            excluded = [i * width + j for i, j in self.neighborhood(safeCell)]
+        available = np.delete(np.arange(height * width), excluded)
+        if not 0 <= mines <= len(available):
+            raise ValueError(f"Cannot place {mines} mines on a {height}x{width} board with {len(excluded)} safe cells")
+
+        # The board is a boolean mask with True wherever there is a mine. Positions are sampled without replacement,
+        # which takes one draw per sampled cell and no rejection. On dense boards the cells without a mine are sampled
+        # instead, so it never takes more than min(mines, safe cells) draws
+        self.board = np.zeros((height, width), dtype=bool)
+        if mines <= len(available) - mines:
+            self.board.flat[available[rng.choice(len(available), mines, replace=False, shuffle=False)]] = True
+        else:
+            self.board.flat[available] = True
+            safe = rng.choice(len(available), len(available) - mines, replace=False, shuffle=False)
+            self.board.flat[available[safe]] = False
+        self._mines = None
+
+        # Count the mines around every cell once, by summing the eight shifted copies of the (zero padded) mask
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        self.clues = np.zeros((height, width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    self.clues += padded[di:di + height, dj:dj + width]
+        self.clues.flags.writeable = False
 
         # Maintain a set of mines that is found by the player
         self.mines_found = set()  # initially this set is empty
 
+    @classmethod
+    def fromArrays(cls, board, clues):
+        """
+        Build an environment straight from a mine mask and its clue counts (such as arrays mapped from a snapshot, see
+        Snapshot), without placing mines or counting clues
+        """
+        game = cls.__new__(cls)
+        game.height, game.width = board.shape
+        game.board = board
+        game._mines = None
+        game.clues = clues
+        game.clues.flags.writeable = False
+        game.mines_found = set()
+        return game
+
+    def neighborhood(self, cell):
+        """
+        Returns the cell together with its neighbors that are on the board
+        """
+        i, j = cell
+        return [(row, col)
+                for row in range(max(0, i - 1), min(i + 2, self.height))
+                for col in range(max(0, j - 1), min(j + 2, self.width))]
+
+    @property
+    def mines(self):
+        """
+        The set of (row, column) mine cells, built from the board the first time it is needed
+        """
+        if self._mines is None:
+            self._mines = set(zip(*(axis.tolist() for axis in np.nonzero(self.board))))
+        return self._mines
+
     def is_mine(self, cell):
         i, j = cell # a board cell contains a row and column, where i is row and j is column
-        return self.board[i][j]
+        return bool(self.board[i, j])
 
     def mineNeighbor(self, cell):
         """
@@ -45,24 +97,39 @@ class Environment():
         within one row and column of a given cell,
         not including the cell itself.
         """
+        i, j = cell
+        return int(self.clues[i, j])
 
-        # Keep count of nearby mines
-        counter = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
+    def floodReveal(self, cell, revealed=(), flags=()):
+        """
+        Reveal a safe cell. If it has no neighboring mines, its neighbors are revealed as well, and so on through every
+        connected cell with a clue of zero, like clicking on an empty region in Minesweeper. Neighbors that are already
+        revealed or flagged are left alone. The given cell is opened even if it is flagged, since revealing it is the
+        move being made.
+        Returns the list of (cell, clue) pairs for every cell opened, starting with the given cell.
+        """
+        if self.is_mine(cell) or cell in revealed:
+            return []
 
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        counter += 1
+        opened = [(cell, self.mineNeighbor(cell))]
+        seen = {cell}
+        index = 0
+        while index < len(opened):
+            current, count = opened[index]
+            index += 1
+            if count != 0:
+                continue
+            for neighbor in self.neighborhood(current):
+                if neighbor not in seen and neighbor not in revealed and neighbor not in flags:
+                    seen.add(neighbor)
+                    opened.append((neighbor, self.mineNeighbor(neighbor)))
+        return opened
 
-        return counter
+    def clueGrid(self):
+        """
+        Returns the (read-only) height x width array holding the clue of every cell
+        """
+        return self.clues
 
     def mineList(self):
         return self.mines
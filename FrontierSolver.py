@@ -0,0 +1,218 @@
+import math
+import time
+
+
+class FrontierSolver():
+    """
+    Exact solver for the frontier of the board: the cells that appear in at least one clue of the knowledge base.
+    The clues are split into independent components (clues that share no cells, directly or through other clues, can
+    be solved separately). Every component is solved by enumerating all of its consistent mine assignments with
+    backtracking, pruning a branch as soon as some clue can no longer be satisfied. Counting, for every cell, the
+    assignments in which it is a mine gives its exact mine probability.
+    Components with more cells than maxComponentSize are skipped and reported, so a single move can never take
+    exponential time. With a sampler (see MonteCarloSampler) they are estimated from random samples instead.
+    When the number of mines left on the board is known, the components are no longer independent: every combination
+    of component solutions with t mines in total leaves the other mines to the undecided cells outside the frontier,
+    which can happen in C(interior, mines - t) ways. Weighting the solutions by these (exact, big integer) binomials
+    gives the exact probability of every frontier cell and of every interior cell. The cells of skipped components are
+    counted as interior cells then.
+    """
+
+    def __init__(self, maxComponentSize=40, sampler=None):
+        self.maxComponentSize = maxComponentSize
+        self.sampler = sampler
+
+        # Details of the last call to solve
+        self.stats = {}
+
+        # Mine probability of an undecided cell outside the frontier, from the last call to solve given the mines left
+        self.interiorProbability = None
+
+        # Running totals over every call to solve
+        self.totals = {"calls": 0, "seconds": 0.0, "largestComponent": 0, "skippedComponents": 0,
+                       "sampledComponents": 0}
+
+    def components(self, clues):
+        """
+        Split the clues into independent components. Returns a list of (cells, clues) pairs, where cells lists every
+        cell of the component in the order the backtracking should assign them.
+        """
+        parent = {}
+
+        def find(cell):
+            while parent[cell] != cell:
+                parent[cell] = parent[parent[cell]]
+                cell = parent[cell]
+            return cell
+
+        clues = [clue for clue in clues if clue.cells]
+        for clue in clues:
+            cells = list(clue.cells)
+            for cell in cells:
+                parent.setdefault(cell, cell)
+            root = find(cells[0])
+            for cell in cells[1:]:
+                other = find(cell)
+                if other != root:
+                    parent[other] = root
+
+        grouped = {}
+        for clue in clues:
+            grouped.setdefault(find(next(iter(clue.cells))), []).append(clue)
+
+        components = []
+        for componentClues in grouped.values():
+            # Assign cells clue by clue, so that every clue is completed (and checked) as early as possible
+            cells = {}
+            for clue in sorted(componentClues, key=lambda clue: len(clue.cells)):
+                for cell in sorted(clue.cells):
+                    cells.setdefault(cell, None)
+            components.append((list(cells), componentClues))
+        return components
+
+    def enumerate(self, cells, clues):
+        """
+        Enumerate every mine assignment of the cells that satisfies all the clues. Returns a dictionary mapping each
+        possible number of mines in the component to a pair (number of assignments, list with the number of those
+        assignments in which each cell is a mine).
+        """
+        position = {cell: index for index, cell in enumerate(cells)}
+        counts = [clue.count for clue in clues]
+        mines = [0] * len(clues)  # mines assigned so far in each clue
+        unassigned = [len(clue.cells) for clue in clues]  # cells of each clue that have not been assigned yet
+        cluesOf = [[] for _ in cells]
+        for index, clue in enumerate(clues):
+            for cell in clue.cells:
+                cluesOf[position[cell]].append(index)
+
+        assignment = [0] * len(cells)
+        solutions = {}
+
+        def assign(depth, total):
+            if depth == len(cells):
+                ways, cellCounts = solutions.setdefault(total, [0, [0] * len(cells)])
+                solutions[total][0] = ways + 1
+                for index, value in enumerate(assignment):
+                    cellCounts[index] += value
+                return
+
+            for value in (0, 1):
+                consistent = True
+                for index in cluesOf[depth]:
+                    mines[index] += value
+                    unassigned[index] -= 1
+                    if mines[index] > counts[index] or mines[index] + unassigned[index] < counts[index]:
+                        consistent = False
+                if consistent:
+                    assignment[depth] = value
+                    assign(depth + 1, total + value)
+                for index in cluesOf[depth]:
+                    mines[index] -= value
+                    unassigned[index] += 1
+
+        assign(0, 0)
+        return {total: (ways, cellCounts) for total, (ways, cellCounts) in solutions.items()}
+
+    def solve(self, clues, mines=None, undecided=None):
+        """
+        Returns a dictionary mapping every frontier cell of a component that could be solved to its probability of
+        being a mine. Details of the run (component sizes, skipped components, timing) are left in self.stats.
+        Given the number of mines left and the number of undecided cells (neither played nor known to be safe or a
+        mine, frontier included), the probabilities take the global mine count into account and the probability of an
+        interior cell is left in self.interiorProbability.
+        """
+        start = time.perf_counter()
+        probabilities = {}
+        sizes = []
+        skipped = 0
+        sampled = 0
+        solved = []  # (cells, solutions) of every component that was enumerated
+        self.interiorProbability = None
+
+        for cells, componentClues in self.components(clues):
+            sizes.append(len(cells))
+            if len(cells) <= self.maxComponentSize:
+                solved.append((cells, self.enumerate(cells, componentClues)))
+            elif self.sampler is not None:
+                solved.append((cells, self.sampler.sample(cells, componentClues)))
+                sampled += 1
+            else:
+                skipped += 1
+
+        if mines is not None:
+            interior = undecided - sum(len(cells) for cells, _ in solved)
+            probabilities, self.interiorProbability = self.weigh(solved, mines, interior)
+
+        if self.interiorProbability is None:  # no global count, or one that contradicts the clues
+            probabilities = {}
+            for cells, solutions in solved:
+                total = sum(ways for ways, _ in solutions.values())
+                if total == 0:  # contradictory clues, nothing can be said about these cells
+                    continue
+                for index, cell in enumerate(cells):
+                    probabilities[cell] = sum(cellCounts[index] for _, cellCounts in solutions.values()) / total
+
+        elapsed = time.perf_counter() - start
+        self.stats = {
+            "components": len(sizes),
+            "componentSizes": sizes,
+            "largestComponent": max(sizes, default=0),
+            "skippedComponents": skipped,
+            "sampledComponents": sampled,
+            "seconds": elapsed,
+        }
+        self.totals["calls"] += 1
+        self.totals["seconds"] += elapsed
+        self.totals["largestComponent"] = max(self.totals["largestComponent"], self.stats["largestComponent"])
+        self.totals["skippedComponents"] += skipped
+        self.totals["sampledComponents"] += sampled
+        return probabilities
+
+    def weigh(self, solved, mines, interior):
+        """
+        Combine the solutions of the components under the global mine count: mines are left on the board, and the
+        interior cells (outside the solved components) take whatever the components do not. Returns the probability of
+        every cell of the components and of an interior cell, or ({}, None) if no combination fits the mine count.
+        """
+        def convolve(first, second):
+            product = [0] * (len(first) + len(second) - 1)
+            for i, a in enumerate(first):
+                if a:
+                    for j, b in enumerate(second):
+                        product[i + j] += a * b
+            return product
+
+        def placements(t):
+            # Number of ways to put the mines that the components do not hold into the interior
+            return math.comb(interior, mines - t) if 0 <= mines - t <= interior else 0
+
+        # ways[c][k]: number of solutions of component c with k mines
+        ways = [[0] * (max(solutions, default=0) + 1) for _, solutions in solved]
+        for c, (_, solutions) in enumerate(solved):
+            for k, (count, _) in solutions.items():
+                ways[c][k] = count
+
+        # Mine count distributions of the components before and after each one, to leave one component out at a time
+        prefix = [[1]]
+        for distribution in ways:
+            prefix.append(convolve(prefix[-1], distribution))
+        suffix = [[1]]
+        for distribution in reversed(ways):
+            suffix.append(convolve(suffix[-1], distribution))
+        suffix.reverse()
+
+        everything = prefix[-1]
+        total = sum(count * placements(t) for t, count in enumerate(everything))
+        if total == 0:
+            return {}, None
+
+        probabilities = {}
+        for c, (cells, solutions) in enumerate(solved):
+            others = convolve(prefix[c], suffix[c + 1])
+            weights = {k: sum(count * placements(s + k) for s, count in enumerate(others)) for k in solutions}
+            for index, cell in enumerate(cells):
+                probabilities[cell] = sum(cellCounts[index] * weights[k]
+                                          for k, (_, cellCounts) in solutions.items()) / total
+
+        interiorMines = sum(count * placements(t) * (mines - t) for t, count in enumerate(everything))
+        return probabilities, interiorMines / (total * interior) if interior else 0.0
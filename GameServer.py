@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+
+import Environment
+
+
+class Session():
+    """
+    The state of one game hosted by the server: the board, the cells revealed, the cells flagged and the mines
+    triggered. This is what the gameplay scripts keep in module-level globals, for a single game.
+    """
+
+    def __init__(self, height, width, mines, seed):
+        self.seed = seed
+        self.game = Environment.Environment(height=height, width=width, mines=mines, seed=seed)
+        self.revealed = set()
+        self.flags = set()
+        self.triggered = set()
+        self.safeCells = height * width - mines
+
+    def reveal(self, cell):
+        """
+        Play a cell, like a left click. Returns the response fields: the outcome ("mine", "safe" or "nothing" when the
+        cell is revealed, flagged or already triggered) and the [row, column, clue] of every cell opened.
+        """
+        if cell in self.revealed or cell in self.flags or cell in self.triggered:
+            return {"outcome": "nothing", "opened": []}
+        if self.game.is_mine(cell):
+            self.triggered.add(cell)
+            return {"outcome": "mine", "opened": []}
+        opened = self.game.floodReveal(cell, self.revealed, self.flags)
+        self.revealed.update(opened_cell for opened_cell, _ in opened)
+        return {"outcome": "safe", "opened": [[i, j, clue] for (i, j), clue in opened]}
+
+    def flag(self, cell):
+        """
+        Toggle the flag on a hidden cell, like a right click. Returns the response fields.
+        """
+        if cell in self.revealed:
+            return {"flagged": False}
+        if cell in self.flags:
+            self.flags.remove(cell)
+            return {"flagged": False}
+        self.flags.add(cell)
+        return {"flagged": True}
+
+    def state(self):
+        """
+        Returns the response fields describing the whole game
+        """
+        return {
+            "revealed": [[i, j, self.game.mineNeighbor((i, j))] for i, j in self.revealed],
+            "flags": [list(cell) for cell in self.flags],
+            "triggered": [list(cell) for cell in self.triggered],
+            "won": len(self.revealed) == self.safeCells and not self.triggered,
+            "finished": len(self.revealed) == self.safeCells,
+        }
+
+
+class GameServer():
+    """
+    Hosts many Minesweeper sessions for clients connected over a TCP or Unix socket. Every request is one line of
+    JSON with an "op" and an optional "id" that is echoed back in its response, also one line of JSON:
+        – {"op": "create", "height": 16, "width": 16, "mines": 40, "seed": 1} -> {"session": ...}
+        – {"op": "reveal", "session": ..., "cell": [row, col]} -> {"outcome": ..., "opened": [[row, col, clue], ...]}
+        – {"op": "flag", "session": ..., "cell": [row, col]} -> {"flagged": ...}
+        – {"op": "state", "session": ...} -> {"revealed": ..., "flags": ..., "triggered": ..., "won": ..., ...}
+        – {"op": "close", "session": ...} -> {}
+    A failed request gets {"error": "..."} instead, and so does a line longer than limit bytes, which is skipped. Only
+    the connection that created a session may close it. Clients may pipeline requests (send many before reading the
+    responses); each connection is answered in order. When a client does not read its responses, the server stops
+    reading its requests once highWater bytes of responses are waiting (backpressure), and it lets other connections
+    run every yieldEvery requests. Sessions are dropped when the connection that created them closes.
+    Boards are built on the event loop, so a board of more than maxCells cells is refused rather than holding up every
+    other connection while it is generated.
+    """
+
+    def __init__(self, maxSessions=100000, maxCells=10 ** 6, highWater=2 ** 16, yieldEvery=64, limit=2 ** 20):
+        self.maxSessions = maxSessions
+        self.maxCells = maxCells
+        self.limit = limit
+        self.highWater = highWater
+        self.yieldEvery = yieldEvery
+
+        self.sessions = {}  # session id -> Session
+        self.ids = itertools.count(1)
+        self.connections = 0
+        self.totals = {"requests": 0, "errors": 0}
+
+    def handle(self, request, owned):
+        """
+        Answer one request. Sessions created are added to the set owned by the connection.
+        """
+        op = request.get("op")
+        if op == "create":
+            if len(self.sessions) >= self.maxSessions:
+                raise ValueError(f"the server already hosts {self.maxSessions} sessions")
+            height, width = int(request.get("height", 16)), int(request.get("width", 16))
+            if height < 1 or width < 1 or height * width > self.maxCells:
+                raise ValueError(f"a {height}x{width} board is not between 1 and {self.maxCells} cells")
+            seed = request.get("seed")
+            session = Session(height, width, int(request.get("mines", 40)),
+                              seed if seed is not None else random.getrandbits(64))
+            sessionId = next(self.ids)
+            self.sessions[sessionId] = session
+            owned.add(sessionId)
+            return {"session": sessionId, "seed": session.seed}
+
+        session = self.sessions.get(request.get("session"))
+        if session is None:
+            raise ValueError(f"unknown session: {request.get('session')}")
+        if op == "reveal" or op == "flag":
+            i, j = (int(value) for value in request["cell"])
+            if not (0 <= i < session.game.height and 0 <= j < session.game.width):
+                raise ValueError(f"cell {[i, j]} is not on the board")
+            return session.reveal((i, j)) if op == "reveal" else session.flag((i, j))
+        if op == "state":
+            return session.state()
+        if op == "close":
+            if request["session"] not in owned:
+                raise ValueError(f"session {request['session']} belongs to another connection")
+            del self.sessions[request["session"]]
+            owned.discard(request["session"])
+            return {}
+        raise ValueError(f"unknown op: {op}")
+
+    async def readLine(self, reader):
+        """
+        Returns the next request line, b"" at the end of the stream, or None if the line was longer than the limit. The
+        rest of a line that is too long is read and dropped, so the next call starts at the following request.
+        """
+        try:
+            return await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as error:
+            return error.partial  # the last line, without its newline
+        except asyncio.LimitOverrunError as error:
+            overrun = error
+        while True:
+            # Drop what is buffered, up to the newline if it has arrived
+            await reader.readexactly(overrun.consumed)
+            try:
+                await reader.readuntil(b"\n")
+                return None
+            except asyncio.IncompleteReadError:
+                return b""
+            except asyncio.LimitOverrunError as error:
+                overrun = error
+
+    async def serve(self, reader, writer):
+        """
+        Answer the requests of one connection until it closes
+        """
+        self.connections += 1
+        owned = set()
+        handled = 0
+        try:
+            while True:
+                line = await self.readLine(reader)
+                if not line and line is not None:
+                    break
+                request = None
+                try:
+                    if line is None:
+                        raise ValueError(f"the request is longer than {self.limit} bytes")
+                    request = json.loads(line)
+                    response = {"id": request.get("id")}
+                    response.update(self.handle(request, owned))
+                except (ValueError, KeyError, TypeError, AttributeError) as error:
+                    self.totals["errors"] += 1
+                    response = {"id": request.get("id") if isinstance(request, dict) else None, "error": str(error)}
+                self.totals["requests"] += 1
+                writer.write(json.dumps(response).encode() + b"\n")
+
+                handled += 1
+                if writer.transport.get_write_buffer_size() > self.highWater:
+                    await writer.drain()
+                elif handled % self.yieldEvery == 0:
+                    await asyncio.sleep(0)
+        except ConnectionError:
+            pass
+        finally:
+            for sessionId in owned:
+                self.sessions.pop(sessionId, None)
+            self.connections -= 1
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        """
+        Start listening on a Unix socket at path, or on the TCP host and port. Returns the asyncio server.
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self.serve, path=path, limit=self.limit, backlog=4096)
+        return await asyncio.start_server(self.serve, host=host, port=port, limit=self.limit, backlog=4096)
+
+
+async def run(host, port, path, maxSessions, maxCells):
+    server = await GameServer(maxSessions=maxSessions, maxCells=maxCells).start(host, port, path)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Minesweeper sessions over newline-delimited JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--max-sessions", type=int, default=100000)
+    parser.add_argument("--max-cells", type=int, default=10 ** 6, help="largest board a session may create")
+    args = parser.parse_args(argv)
+    print(f"Serving on {args.unix or f'{args.host}:{args.port}'}")
+    asyncio.run(run(args.host, args.port, args.unix, args.max_sessions, args.max_cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,138 @@
+import collections
 import itertools
 import random
+import CellGrid
+import CellPool
 import Clue
+import FrontierSolver
+import KnowledgeBase
+import MatrixSolver
+import MonteCarloSampler
+import Trace
 import Environment
 
 
 class ImprovedAgent():
     """
     This improved agent uses inference based prediction approach to solving the board
+
+    When no safe move is known, the guess mode decides which cell to reveal:
+        – "random": pick uniformly from the cells that have not been played and are not known to be mines
+        – "exact": compute the exact mine probability of every frontier cell (see FrontierSolver) and reveal the
+            lowest-risk cell. Components larger than maxComponentSize are left out, unless samples is set: they are
+            then estimated from that many random samples (see MonteCarloSampler), drawn within sampleSeconds if given
+            and over sampleProcesses worker processes
+
+    The inference mode decides how clues are combined:
+        – "subset": when the cells of one clue are a subset of another's, their difference is a new clue
+        – "matrix": subset inference, and whenever it leaves no safe move, the frontier clues are also reduced by
+            Gaussian elimination to find the safe cells and mines that only follow from several clues at once (see
+            MatrixSolver)
+
+    Given the total number of mines, the agent also uses it as a global constraint: when the undecided cells must all
+    be safe or all be mines, and, with the "exact" guess mode, to weigh the frontier solutions and give the cells
+    outside the frontier their exact probability (see FrontierSolver).
+
+    With bitmask=True the clues are stored as Clue.BitClue (integer bitmasks) instead of Clue.Clue (sets of cells).
+
+    Moves, clues, inferences, marks and knowledge base dumps are reported to an optional Trace.Tracer instead of being
+    printed, and the time spent in each phase to an optional Profiler.Profiler.
     """
 
-    def __init__(self, height=50, width=50):
+    def __init__(self, height=50, width=50, guess="random", maxComponentSize=40, bitmask=False, inference="subset",
+                 mines=None, samples=0, sampleSeconds=None, sampleProcesses=1, tracer=None, profiler=None):
 
         # Initialize the dimensions of the board,set the height and width
         self.height = height
         self.width = width
+        self.mines = mines  # total number of mines on the board, if known
+
+        # What is known about every cell (played, known safe, known mine), one byte per cell. The sets below are read-only
+        # views of it
+        self.cellGrid = CellGrid.CellGrid(height, width)
 
-        self.track_moves = set()  # Keep a track of the moves which have been made
-        self.total_cells = set()  # as well as a set of all board cells -> total cells
-        for x in range(height):
-            for y in range(width):
-                self.total_cells.add((x, y))  # adds all locations (x,y) into all cells
+        self.track_moves = self.cellGrid.view(CellGrid.REVEALED)  # Keep a track of the moves which have been made
+        self.unknownCells = CellPool.CellPool(height, width)  # as well as the cells not played and not known to be mines
 
         # Keep track of cells known to be safe or mines
-        self.mineSet = set()  # keep a track of the board cells known to be mines
-        self.safeSet = set()  # keep a track of the board cells known to be safes
+        self.mineSet = self.cellGrid.view(CellGrid.MINE)  # keep a track of the board cells known to be mines
+        self.safeSet = self.cellGrid.view(CellGrid.SAFE)  # keep a track of the board cells known to be safes
+        self.safeQueue = collections.deque()  # known safe cells that have not been played yet, in the order found
 
         # List of clues (set of cells and count of how many are mines)
-        self.knowledgeBase = []
+        self.knowledgeBase = KnowledgeBase.KnowledgeBase()
         # Example knowledge base: [((set of cells) = count), ((set2 of cells) = count), ((set3 of cells) = count)]
 
+        # How many clues were processed and cells marked during the last move (see KnowledgeBase.Counters)
+        self.propagationStats = self.knowledgeBase.Counters()
+
+        # Where to report what the agent does. Events are only built when their level is enabled
+        self.tracer = tracer
+        self.traceLevel = tracer.level if tracer is not None else Trace.OFF
+
+        # Where to record the time spent in each phase (see Profiler), if any
+        self.profiler = profiler
+        if profiler is not None:
+            for phase in ("updateKnowledgeBase", "newInferences", "matrixInferences", "MarkMine", "MarkSafe"):
+                setattr(self, phase, profiler.wrap(phase, getattr(self, phase)))
+            self.add_knowledge_many = profiler.wrapMove("add_knowledge_many", self.add_knowledge_many,
+                                                        lambda: {"knowledgeBase": len(self.knowledgeBase)})
+
+        # How to pick a cell when there is no safe move
+        if guess not in ("random", "exact"):
+            raise ValueError(f"Unknown guess mode: {guess}")
+        self.guess = guess
+        sampler = MonteCarloSampler.MonteCarloSampler(samples, sampleSeconds, sampleProcesses) if samples else None
+        self.solver = FrontierSolver.FrontierSolver(maxComponentSize=maxComponentSize, sampler=sampler)
+
+        # Which clue representation to use
+        self.bitmask = bitmask
+
+        # How to combine clues
+        if inference not in ("subset", "matrix"):
+            raise ValueError(f"Unknown inference mode: {inference}")
+        self.inference = inference
+        self.matrix = MatrixSolver.MatrixSolver()
+
+    def close(self):
+        """
+        Stop the worker processes of the sampler, if any were started. The agent can keep playing afterwards, and starts
+        them again when it next needs them.
+        """
+        if self.solver.sampler is not None:
+            self.solver.sampler.close()
+
+    def makeClue(self, cells, count):
+        """
+        Build a clue of the configured representation from a collection of cells and a count
+        """
+        if self.bitmask:
+            return Clue.BitClue(cells, count, self.width)
+        return Clue.Clue(cells, count)
+
     def MarkMine(self, cell):
         """
         Add the cell to the set of board cells known to be mines.
-        For each clue in the knowledge base, mark the cell as a mine as well.
+        For each clue in the knowledge base that contains the cell, mark the cell as a mine as well.
         This updates the cell as a mine in the total knowledge base.
         """
-        counter = 0
-        self.mineSet.add(cell)
-        for clue in self.knowledgeBase:
-            counter = counter + clue.MarkMine(cell)
-        return counter
+        self.cellGrid.add(cell, CellGrid.MINE)
+        self.unknownCells.discard(cell)
+        if self.traceLevel >= Trace.MARKS:
+            self.tracer.emit("mine", cell=cell)
+        return self.knowledgeBase.MarkMine(cell)
 
     def MarkSafe(self, cell):
         """
         Add the cell to the set of board cells known to be safes.
-        For each clue in the knowledge base, mark the cell as a safe as well.
+        For each clue in the knowledge base that contains the cell, mark the cell as a safe as well.
         This updates the cell as a safe in the total knowledge base.
         """
-        counter = 0
-        self.safeSet.add(cell)
-        for clue in self.knowledgeBase:
-            counter = counter + clue.MarkSafe(cell)
-        return counter
+        if self.cellGrid.add(cell, CellGrid.SAFE) and not self.cellGrid.has(cell, CellGrid.REVEALED):
+            self.safeQueue.append(cell)
+        if self.traceLevel >= Trace.MARKS:
+            self.tracer.emit("safe", cell=cell)
+        return self.knowledgeBase.MarkSafe(cell)
 
     def add_knowledge(self, cell, count):
         """
@@ -61,27 +142,70 @@ class ImprovedAgent():
         mark any other cell as safe or mine that can be inferred using basic inference techniques, and finally update
         the knowledge base with any new clues that can be inferred.
         """
-        # add cell to list of moves that have been made
-        self.track_moves.add(cell)
-
-        # add cell to list of safe cells
-        self.MarkSafe(cell)
-
-        # maintain a set of neighbors for a cell
-        neighboringCells = set()
-
-        i, j = cell
-
-        # parse through neighbors/surrounding cells of a given cell
-        for row in range(max(0, i - 1), min(i + 2, self.height)):
-            for col in range(max(0, j - 1), min(j + 2, self.width)):
-                # ignores the cell itself, and parses through neighboring cells and adds it to set of neighbors
-                if (row, col) != (i, j):
-                    neighboringCells.add((row, col)) # add cell to set of neighboring cells
-
-        # add the clue to the knowledge base, each clue is represented by a set of cells as well as a count
-        self.knowledgeBase.append(Clue.Clue(neighboringCells, count))
+        self.add_knowledge_many([(cell, count)])
 
+    def add_knowledge_many(self, cells):
+        """
+        Same as add_knowledge, for a whole batch of revealed cells given as (cell, count) pairs, such as the cells
+        opened by Environment.floodReveal. Every cell is marked as safe and gets its clue first, and the propagation
+        and inference then run once for the whole batch.
+        """
+        # start counting the propagation work done for this move
+        self.knowledgeBase.ResetCounters()
+
+        for cell, count in cells:
+            # add cell to list of moves that have been made
+            self.cellGrid.add(cell, CellGrid.REVEALED)
+            self.unknownCells.discard(cell)
+            if self.traceLevel >= Trace.MOVES:
+                self.tracer.emit("move", cell=cell, count=count)
+
+            # add cell to list of safe cells
+            self.MarkSafe(cell)
+
+        flags = self.cellGrid.cells
+        for cell, count in cells:
+            # maintain a set of neighbors for a cell
+            neighboringCells = set()
+
+            i, j = cell
+
+            # parse through neighbors/surrounding cells of a given cell
+            for row in range(max(0, i - 1), min(i + 2, self.height)):
+                for col in range(max(0, j - 1), min(j + 2, self.width)):
+                    # ignores the cell itself and cells already known to be safe, and parses through neighboring cells
+                    # and adds it to set of neighbors. Known mines are left out as well, and taken off the count
+                    known = flags[row * self.width + col]
+                    if known & CellGrid.MINE:
+                        count -= 1
+                    elif (row, col) != (i, j) and not known & CellGrid.SAFE:
+                        neighboringCells.add((row, col)) # add cell to set of neighboring cells
+
+            # add the clue to the knowledge base, each clue is represented by a set of cells as well as a count. Inside
+            # an opened region every neighbor is already known, and there is nothing to add
+            if not neighboringCells:
+                continue
+            self.knowledgeBase.append(self.makeClue(neighboringCells, count))
+            if self.traceLevel >= Trace.KNOWLEDGE:
+                self.tracer.emit("clue", cells=Trace.cells(neighboringCells), count=count)
+
+        self.infer()
+        self.propagationStats = self.knowledgeBase.Counters()
+        self.knowledgeBase.ResetCounters()  # the per-clue counts are not needed once the move is summed up
+        if self.profiler is not None:
+            self.profiler.count("cellsRevealed", len(cells))
+            self.profiler.count("cluesProcessed", self.propagationStats["cluesProcessed"])
+            self.profiler.count("cellsMarked", self.propagationStats["cellsMarked"])
+
+        if self.traceLevel >= Trace.STATE:
+            self.traceState()
+
+    def infer(self):
+        """
+        Propagate the known safes and mines, then add the clues inferred from subsets and propagate again, until no new
+        clue can be inferred. The last call to newInferences removes the clues left without cells, and nothing is marked
+        after it, so no resolved clue stays in the knowledge base.
+        """
         # call the update knowledge base function, which marks additional cells as either safe cells or mine cells
         self.updateKnowledgeBase()
 
@@ -90,55 +214,65 @@ class ImprovedAgent():
         while inferences:
             for clue in inferences:
                 self.knowledgeBase.append(clue)
+                if self.traceLevel >= Trace.KNOWLEDGE:
+                    self.tracer.emit("inference", cells=Trace.cells(clue.cells), count=clue.count)
 
             # call the update knowledge base function, which marks additional cells as either safe cells or mine cells
             self.updateKnowledgeBase()
 
             inferences = self.newInferences()
-        print("\nMove: ", cell)
 
-        while self.SimplifyKnowledgeBase() != self.knowledgeBase:
-            pass
-
-    def SimplifyKnowledgeBase(self):
+    def matrixInferences(self):
         """
-        Make a copy of the current knowledge base and iterate through each clue. For each clue, retrieve the known safes
-        & known mines. Iterate through each set, and update it with the union of both and remove it from the knowledge
-        base.
+        Mark the safe cells and mines that Gaussian elimination over the frontier clues deduces (see MatrixSolver), and
+        infer from them as usual. Returns True if anything new was found.
         """
-
-        # make a copy of the current knowledge base
-        GoThroughClues = self.knowledgeBase.copy()
-
-        for clue in GoThroughClues:  # Queries all the clues in the knowledge base
-            # call known_safes function from the Clue class, returns set of safe cells and stores in known_safes
-            SafesQueried = clue.SafesKnown()
-            # call known_mines function from the Clue class, returns set of mine cells and stores in known_mines
-            MinesQueried = clue.MinesKnown()
-
-            if SafesQueried:
-                self.safeSet.update(SafesQueried)  # Add to safeSet
-                self.knowledgeBase.remove(clue)  # remove clue from the knowledge base
-
-            if MinesQueried:
-                self.knowledgeBase.remove(clue)  # remove clue from knowledge base
-                for mine in MinesQueried.union(self.mineSet):
-                    # if there is an overlap between known_mines and self.mines, mark the mine
-                    self.MarkMine(mine)
-
-        return self.knowledgeBase
+        safes, mines = self.matrix.deduce(self.solver.components(self.knowledgeBase))
+        for cell in safes:
+            self.MarkSafe(cell)
+        for cell in mines:
+            self.MarkMine(cell)
+        if not safes and not mines:
+            return False
+        self.infer()
+        return True
+
+    def globalInferences(self):
+        """
+        Use the total number of mines, if the agent was given it: once every mine has been found all the undecided cells
+        are safe, and once the undecided cells are as many as the mines left they are all mines. Only called without a
+        safe move, when every cell of the pool is undecided. Returns True if anything new was found.
+        """
+        if self.mines is None or len(self.unknownCells) == 0:
+            return False
+        remaining = self.mines - len(self.mineSet)
+        if remaining == 0:
+            for cell in list(self.unknownCells):
+                self.MarkSafe(cell)
+        elif remaining == len(self.unknownCells):
+            for cell in list(self.unknownCells):
+                self.MarkMine(cell)
+        else:
+            return False
+        self.infer()
+        return True
 
     def move_safely(self):
         """
-        Picks a safe move from the set of safe moves (safeSet) available to make. If there is not a safe move to be made
-        the function does not return anything
+        Picks a safe move from the set of safe moves (safeSet) available to make, in the order they were found. If there
+        is not a safe move to be made the function does not return anything
         """
-        for move in self.safeSet:
-            if move not in self.track_moves and move not in self.mineSet:
-                self.print()
-                return move
-            else:
-                print("No safe moves available :(")
+        while True:
+            # drop the queued cells that have been played since they were found
+            while self.safeQueue and self.cellGrid.has(self.safeQueue[0], CellGrid.REVEALED | CellGrid.MINE):
+                self.safeQueue.popleft()
+            if self.safeQueue:
+                return self.safeQueue[0]
+            # without a safe move left, combine the clues harder before giving up
+            if not self.globalInferences() and (self.inference != "matrix" or not self.matrixInferences()):
+                break
+        if self.traceLevel >= Trace.MOVES:
+            self.tracer.emit("noSafeMove")
         return None
 
     def move_randomly(self):
@@ -147,11 +281,47 @@ class ImprovedAgent():
         already been made - moves that have been identified as mines). If there is not a random move, available moves ≤ 0
         to be made the function does not return anything
         """
-        availableMoves = self.total_cells - self.track_moves - self.mineSet  # makes a move that has not already been made and is known to not be a mine
-        if len(availableMoves) > 0:
-            return random.choice(tuple(availableMoves))
-        else:
+        if len(self.unknownCells) == 0:
             return None
+        if self.guess == "exact":
+            return self.move_by_probability()
+        return self.unknownCells.choice()  # makes a move that has not already been made and is known to not be a mine
+
+    def move_by_probability(self):
+        """
+        Picks the available move least likely to be a mine. Frontier cells get their exact probability from the
+        solver. When the total number of mines is known, so do the cells outside the frontier; otherwise they are
+        assumed to be as risky as the density of mines found so far, which is estimated from the known mines plus the
+        expected number of mines on the frontier.
+        """
+        remaining = self.mines - len(self.mineSet) if self.mines is not None else None
+        probabilities = self.solver.solve(self.knowledgeBase, remaining, len(self.unknownCells))
+        if not probabilities:
+            return self.unknownCells.choice()
+
+        lowest = min(probabilities.values())
+        density = self.solver.interiorProbability
+        if density is None:
+            explored = len(self.track_moves) + len(self.mineSet) + len(probabilities)
+            density = (len(self.mineSet) + sum(probabilities.values())) / explored
+
+        # every frontier cell is still unknown, so the rest of the pool is the interior
+        interior = len(self.unknownCells) - len(probabilities)
+        if interior > 0 and density < lowest:
+            return self.interior_choice(probabilities, interior)
+        return random.choice([cell for cell, probability in probabilities.items() if probability == lowest])
+
+    def interior_choice(self, frontier, interior):
+        """
+        Picks a random unknown cell that is not on the frontier. While the interior is a good share of the pool, random
+        picks from the pool are retried until one misses the frontier; otherwise the interior is listed out.
+        """
+        if interior * 8 >= len(self.unknownCells):
+            while True:
+                cell = self.unknownCells.choice()
+                if cell not in frontier:
+                    return cell
+        return random.choice([cell for cell in self.unknownCells if cell not in frontier])
 
     def print(self):
         print("\n\n\n")
@@ -168,61 +338,67 @@ class ImprovedAgent():
 
     def newInferences(self):
         """
-        For each clue in the knowledge base: add it to the list of removed clues if it does not contain any cells
-        Choose another clue from the knowledge base, check if it is empty (add to list of removed clues if it is)
-        Make sure the two clues are different from one another and if the list of cells in the clues overlap(using
-        subset). If it is a subset, then inferences can be drawn. Finally, remove any clues that are empty sets
+        For each clue added or shrunk since the last call: add it to the list of removed clues if it does not contain
+        any cells. Otherwise compare it with every other clue it shares a cell with (found through the cell index of the
+        knowledge base), since only overlapping clues can be subsets of one another. If the cells of one clue are a
+        subset of the other, then inferences can be drawn. Finally, remove any clues that are empty sets
         """
 
         inferences = []  # maintain a list of inferences
+        found = set()  # cells and count of every inference drawn in this round, so each is only added once
         removeClue = []  # maintain a list of clues to remove
+        comparisons = 0  # number of subset tests made, for the profiler
 
-        for clue1 in self.knowledgeBase:
+        for clue1 in self.knowledgeBase.TakeChanged():
             # mark for removal if it is empty
-            if clue1.cells == set():
+            if len(clue1) == 0:
                 removeClue.append(clue1)
                 continue
-            for clue2 in self.knowledgeBase:
-                if clue2.cells == set():
-                    removeClue.append(clue2)
-                    continue
-                if clue1 != clue2:  # make sure the clues are different from one another
-                    if clue2.cells.issubset(clue1.cells):  # if s2 is a subset of s1
-                        compareCells = clue1.cells.difference(clue2.cells)
-                        compareCount = clue1.count - clue2.count
-                        new_inference = Clue.Clue(compareCells, compareCount)
+            for clue2 in self.knowledgeBase.Overlapping(clue1):
+                # the changed clue may either contain the other clue or be contained in it
+                for bigger, smaller in ((clue1, clue2), (clue2, clue1)):
+                    comparisons += 1
+                    if bigger != smaller and smaller.issubset(bigger):  # if smaller is a subset of bigger
+                        new_inference = bigger.difference(smaller)
+                        if new_inference.key() in found:
+                            continue
                         if new_inference not in self.knowledgeBase:
+                            found.add(new_inference.key())
                             inferences.append(new_inference)
 
         # remove sentences without any cells
-        self.knowledgeBase = [clues for clues in self.knowledgeBase if clues not in removeClue]
+        for clue in removeClue:
+            self.knowledgeBase.remove(clue)
+        if self.profiler is not None:
+            self.profiler.count("subsetComparisons", comparisons)
+            self.profiler.count("inferences", len(inferences))
         return inferences
 
     def updateKnowledgeBase(self):
         """
-        This function marks additional cells as mines or safes.
-        """
-        count = 1
-        while count:
-            count = 0
-            # Iterate through all the clues within the knowledge base
-            for clue in self.knowledgeBase:
-                # Iterate through all the cells for the safes known within a clue
-                for cell in clue.SafesKnown():  # calls the SafesKnown function from the Clue class
-                    # Mark the cell as safe and update the count
-                    self.MarkSafe(cell)
-                    count += 1
-                for cell in clue.MinesKnown():  # calls the MinesKnown function from the Clue class
-                    # Mark the cell as a mine and update the count
-                    self.MarkMine(cell)
-                    count += 1
-            # Iterate through all the cells from the set of safe cells
-            for cell in self.safeSet:
-                count += self.MarkSafe(cell)
-
-            # Iterate through all the cells from the set of mine cells
-            for cell in self.mineSet:
-                count += self.MarkMine(cell)
+        This function marks additional cells as mines or safes. Clues are taken off the worklist of the knowledge base
+        one at a time; marking a cell shrinks the clues that contain it and puts them back on the worklist, so the
+        propagation stops as soon as no clue that changed is left to check.
+        """
+        while True:
+            clue = self.knowledgeBase.PopWork()
+            if clue is None:
+                break
+            # Iterate through all the cells for the safes known within a clue
+            for cell in clue.SafesKnown():  # calls the SafesKnown function from the Clue class
+                self.MarkSafe(cell)
+            for cell in clue.MinesKnown():  # calls the MinesKnown function from the Clue class
+                self.MarkMine(cell)
+
+    def traceState(self):
+        """
+        Report the whole knowledge base, the confirmed safe cells and the confirmed mine cells to the tracer
+        """
+        self.tracer.emit("state",
+                         knowledgeBase=[{"cells": Trace.cells(clue.cells), "count": clue.count}
+                                        for clue in self.knowledgeBase],
+                         safeSet=Trace.cells(self.safeSet),
+                         mineSet=Trace.cells(self.mineSet))
 
     def FlagCells(self):
         """
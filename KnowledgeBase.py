@@ -0,0 +1,206 @@
+import collections
+
+
+class KnowledgeBase():
+    """
+    The clues known to an agent, kept in insertion order, together with an index from each cell to the clues that
+    contain it. Marking a cell as a mine or as safe goes through the knowledge base, so only the clues that actually
+    contain the cell are touched and the index stays current as clues are added, shrunk and removed.
+    The knowledge base also remembers which clues were added or shrunk since the last call to TakeChanged, so that
+    inference only has to revisit the clues touched by the last change.
+    Every added or shrunk clue is also pushed onto a worklist, which the agents drain to propagate safe cells and mines
+    until nothing is left to resolve. Counters record how often each clue and cell were processed since the last call
+    to ResetCounters.
+    Every clue is also filed under its canonical key (Clue.key), so membership, removal of an equal clue and
+    duplicate detection are dictionary lookups. An equal clue is never stored twice: append skips a clue that is
+    already known, and a clue that shrinks into a copy of another one is dropped in favour of that one. Clues are only
+    ever changed through MarkMine and MarkSafe, which file them under their new key.
+    Dictionaries keep their capacity when entries are deleted, so once the knowledge base has shrunk to a fraction of
+    its largest size it is copied into right-sized dictionaries. A burst of clues (such as a large flood reveal) then
+    does not hold on to its memory for the rest of the game.
+    """
+
+    def __init__(self, clues=()):
+        self.clues = {}  # id(clue) -> clue, in the order the clues were added
+        self.keys = {}  # clue.key() -> clue, for every clue
+        self.cellIndex = {}  # cell -> {id(clue): clue} for every clue that contains the cell
+        self.changed = {}  # id(clue) -> clue for the clues added or shrunk since the last call to TakeChanged
+        self.worklist = collections.deque()  # clues waiting to be checked for known safes and mines
+        self.queued = {}  # id(clue) -> clue for the clues currently on the worklist
+
+        self.clueVisits = {}  # id(clue) -> number of times the clue was taken off the worklist
+        self.cellMarks = {}  # cell -> number of times the cell was marked
+
+        self.peak = 0  # largest number of clues since the dictionaries were last right-sized
+
+        for clue in clues:
+            self.append(clue)
+
+    def __iter__(self):
+        return iter(self.clues.values())
+
+    def __len__(self):
+        return len(self.clues)
+
+    def __contains__(self, clue):
+        return clue.key() in self.keys
+
+    def copy(self):
+        """
+        Returns a list of the clues, which can be iterated over while the knowledge base is being changed
+        """
+        return list(self.clues.values())
+
+    def append(self, clue):
+        """
+        Add a clue to the knowledge base and index each of its cells. Returns False, and leaves the knowledge base as it
+        was, if an equal clue is already known.
+        """
+        if self.keys.setdefault(clue.key(), clue) is not clue:
+            return False
+        self.clues[id(clue)] = clue
+        self.changed[id(clue)] = clue
+        self.Push(clue)
+        for cell in clue.cells:
+            self.cellIndex.setdefault(cell, {})[id(clue)] = clue
+        self.peak = max(self.peak, len(self.clues))
+        return True
+
+    def remove(self, clue):
+        """
+        Remove a clue (or, if that exact clue is not stored, the one equal to it) from the knowledge base
+        """
+        if id(clue) not in self.clues:
+            clue = self.keys[clue.key()]
+        del self.clues[id(clue)]
+        key = clue.key()
+        if self.keys.get(key) is clue:  # a clue dropped by Rekey has already left its key to the clue it equals
+            del self.keys[key]
+        self.changed.pop(id(clue), None)
+        self.queued.pop(id(clue), None)
+        for cell in clue.cells:
+            containing = self.cellIndex[cell]
+            del containing[id(clue)]
+            if not containing:
+                del self.cellIndex[cell]
+        if len(self.clues) * 4 < self.peak and self.peak > 256:
+            self.Compact()
+
+    def Compact(self):
+        """
+        Copy the dictionaries into new ones sized for the clues that are left
+        """
+        self.clues = dict(self.clues)
+        self.keys = dict(self.keys)
+        self.changed = dict(self.changed)
+        self.queued = dict(self.queued)
+        self.cellIndex = dict(self.cellIndex)
+        self.peak = len(self.clues)
+
+    def Restore(self, clues, worklist=(), changed=()):
+        """
+        Fill an empty knowledge base with the clues, in order, with exactly the given clues waiting on the worklist
+        (in that order) and counted as changed. Used to bring back a knowledge base saved in the middle of a game.
+        """
+        for clue in clues:
+            self.append(clue)
+        self.worklist = collections.deque(worklist)
+        self.queued = {id(clue): clue for clue in worklist}
+        self.changed = {id(clue): clue for clue in changed}
+
+    def Rekey(self, clue):
+        """
+        File a clue that was just shrunk under its new key, and put it on the worklist as changed. If it has become
+        equal to another clue, it is removed and the other clue takes its place.
+        """
+        known = self.keys.setdefault(clue.key(), clue)
+        if known is not clue:
+            self.remove(clue)
+            clue = known
+        self.changed[id(clue)] = clue
+        self.Push(clue)
+
+    def CluesWith(self, cell):
+        """
+        Returns the list of clues that contain the cell
+        """
+        return list(self.cellIndex.get(cell, {}).values())
+
+    def Overlapping(self, clue):
+        """
+        Returns the list of other clues that share at least one cell with the clue
+        """
+        overlapping = {}
+        for cell in clue.cells:
+            overlapping.update(self.cellIndex.get(cell, {}))
+        overlapping.pop(id(clue), None)
+        return list(overlapping.values())
+
+    def TakeChanged(self):
+        """
+        Returns the list of clues added or shrunk since the last call, and starts tracking changes afresh
+        """
+        changed = list(self.changed.values())
+        self.changed = {}
+        return changed
+
+    def Push(self, clue):
+        """
+        Put a clue on the worklist, unless it is already waiting there
+        """
+        if id(clue) not in self.queued:
+            self.queued[id(clue)] = clue
+            self.worklist.append(clue)
+
+    def PopWork(self):
+        """
+        Returns the next clue on the worklist, or None once the worklist is empty
+        """
+        while self.worklist:
+            clue = self.worklist.popleft()
+            if self.queued.pop(id(clue), None) is not None:  # skip clues removed while they were waiting
+                self.clueVisits[id(clue)] = self.clueVisits.get(id(clue), 0) + 1
+                return clue
+        return None
+
+    def ResetCounters(self):
+        """
+        Start counting clue visits and cell marks afresh (the agents do this at the start of every move)
+        """
+        self.clueVisits = {}
+        self.cellMarks = {}
+
+    def Counters(self):
+        """
+        Returns how much propagation work was done since the last call to ResetCounters
+        """
+        return {
+            "cluesProcessed": sum(self.clueVisits.values()),
+            "cellsMarked": sum(self.cellMarks.values()),
+            "maxClueVisits": max(self.clueVisits.values(), default=0),
+            "maxCellMarks": max(self.cellMarks.values(), default=0),
+        }
+
+    def MarkMine(self, cell):
+        """
+        Mark the cell as a mine in every clue that contains it. Returns the number of clues that were updated.
+        """
+        self.cellMarks[cell] = self.cellMarks.get(cell, 0) + 1
+        containing = self.cellIndex.pop(cell, {})
+        for clue in containing.values():
+            del self.keys[clue.key()]
+            clue.MarkMine(cell)
+            self.Rekey(clue)
+        return len(containing)
+
+    def MarkSafe(self, cell):
+        """
+        Mark the cell as safe in every clue that contains it. Returns the number of clues that were updated.
+        """
+        self.cellMarks[cell] = self.cellMarks.get(cell, 0) + 1
+        containing = self.cellIndex.pop(cell, {})
+        for clue in containing.values():
+            del self.keys[clue.key()]
+            clue.MarkSafe(cell)
+            self.Rekey(clue)
+        return len(containing)
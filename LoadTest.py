@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+import GameServer
+
+
+async def connect(host, port, path):
+    if path is not None:
+        return await asyncio.open_unix_connection(path, limit=2 ** 20)
+    return await asyncio.open_connection(host, port, limit=2 ** 20)
+
+
+async def client(address, sessions, depth, seconds, height, width, mines, latencies, totals, seed):
+    """
+    One connection of the load test. It creates its sessions, then keeps up to depth requests in flight (pipelined) for
+    the given number of seconds: mostly reveals of random cells, with some flags and state queries, on random sessions.
+    The latency of every request (from sending it to reading its response) is appended to latencies.
+    """
+    rng = random.Random(seed)
+    reader, writer = await connect(*address)
+
+    for index in range(sessions):
+        writer.write(json.dumps({"op": "create", "id": index, "height": height, "width": width, "mines": mines,
+                                 "seed": rng.getrandbits(32)}).encode() + b"\n")
+    await writer.drain()
+    ids = []
+    for _ in range(sessions):
+        response = json.loads(await reader.readline())
+        if "error" in response:
+            totals["errors"] += 1
+        else:
+            ids.append(response["session"])
+    if not ids:  # the server refused every session, there is nothing to play
+        writer.close()
+        return
+
+    sent = {}  # request id -> time it was sent
+    window = asyncio.Semaphore(depth)
+
+    async def receive():
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            latencies.append(time.perf_counter() - sent.pop(response["id"]))
+            totals["errors"] += "error" in response
+            window.release()
+
+    receiver = asyncio.create_task(receive())
+    deadline = time.perf_counter() + seconds
+    requestId = 0
+    while time.perf_counter() < deadline:
+        await window.acquire()
+        requestId += 1
+        session = rng.choice(ids)
+        roll = rng.random()
+        if roll < 0.05:
+            request = {"op": "state", "session": session}
+        elif roll < 0.15:
+            request = {"op": "flag", "session": session, "cell": [rng.randrange(height), rng.randrange(width)]}
+        else:
+            request = {"op": "reveal", "session": session, "cell": [rng.randrange(height), rng.randrange(width)]}
+        request["id"] = requestId
+        sent[requestId] = time.perf_counter()
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+    for _ in range(depth):  # wait for the responses still in flight
+        await window.acquire()
+    receiver.cancel()
+    writer.close()
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+
+async def loadTest(address, connections, sessions, depth, seconds, height, width, mines, seed):
+    latencies = []
+    totals = {"errors": 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(address, sessions, depth, seconds, height, width, mines, latencies, totals, seed + i)
+                           for i in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "requestsPerSecond": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else 0.0,
+        "errors": totals["errors"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test GameServer with many concurrent sessions")
+    parser.add_argument("--host", default=None,
+                        help="test a running server at this host (127.0.0.1 with --port alone) instead of starting one")
+    parser.add_argument("--port", type=int, default=None, help="port of the running server (8765 with --host alone)")
+    parser.add_argument("--unix", default=None, help="test a running server on this Unix socket instead")
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--sessions", type=int, default=10, help="sessions per connection")
+    parser.add_argument("--depth", type=int, default=16, help="requests in flight per connection (pipelining)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--height", type=int, default=16)
+    parser.add_argument("--width", type=int, default=16)
+    parser.add_argument("--mines", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.host is None and args.port is None and args.unix is None:
+        # Start a server of our own, in another process so that it does not share the client's CPU
+        args.unix = os.path.join(tempfile.mkdtemp(), "minesweeper.sock")
+        server = multiprocessing.Process(target=GameServer.main, args=(["--unix", args.unix],), daemon=True)
+        server.start()
+        while not os.path.exists(args.unix):
+            time.sleep(0.05)
+    elif args.unix is None:
+        args.host = args.host or "127.0.0.1"
+        args.port = args.port or 8765
+
+    try:
+        report = asyncio.run(loadTest((args.host, args.port, args.unix), args.connections, args.sessions, args.depth,
+                                      args.seconds, args.height, args.width, args.mines, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            os.remove(args.unix)
+
+    print(f"{args.connections} connections x {args.sessions} sessions = {args.connections * args.sessions} sessions,"
+          f" {args.depth} requests in flight per connection")
+    print(f"\tRequests:          {report['requests']} in {report['seconds']:.1f} s ({report['errors']} errors)")
+    print(f"\tRequests/s:        {report['requestsPerSecond']:.0f}")
+    print(f"\tLatency p50:       {report['p50'] * 1000:.2f} ms")
+    print(f"\tLatency p99:       {report['p99'] * 1000:.2f} ms")
+    print(f"\tLatency max:       {report['max'] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
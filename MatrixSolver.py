@@ -0,0 +1,96 @@
+import time
+
+import numpy as np
+
+# Coefficients smaller than this are rounding errors of the elimination and are treated as zero
+EPSILON = 1e-9
+
+
+class MatrixSolver():
+    """
+    Deduces safe cells and mines from the frontier with linear algebra. Each independent component of clues (see
+    FrontierSolver.components) becomes a 0/1 matrix with a row per clue and a column per cell, augmented with the clue
+    counts, which is brought to reduced row echelon form by Gaussian elimination (one vectorized row update per pivot).
+    Every reduced row is a constraint sum(c * x) = b over mine indicators x in {0, 1}. When b equals the sum of the
+    positive coefficients, every cell with a positive coefficient must be a mine and every cell with a negative one
+    safe; when b equals the sum of the negative coefficients, it is the other way round. Combining clues this way finds
+    deductions that need three or more overlapping clues, in polynomial time.
+    """
+
+    def __init__(self):
+        # Details of the last call to deduce
+        self.stats = {}
+
+        # Running totals over every call to deduce
+        self.totals = {"calls": 0, "seconds": 0.0, "largestComponent": 0, "safes": 0, "mines": 0}
+
+    def reduce(self, matrix):
+        """
+        Bring the augmented matrix to reduced row echelon form in place, with partial pivoting. Returns the nonzero rows.
+        """
+        rows, columns = matrix.shape
+        row = 0
+        for column in range(columns - 1):
+            if row == rows:
+                break
+            pivot = row + int(np.argmax(np.abs(matrix[row:, column])))
+            if abs(matrix[pivot, column]) < EPSILON:
+                continue
+            matrix[[row, pivot]] = matrix[[pivot, row]]
+            matrix[row] /= matrix[row, column]
+            factors = matrix[:, column].copy()
+            factors[row] = 0.0
+            matrix -= np.outer(factors, matrix[row])
+            row += 1
+        matrix[np.abs(matrix) < EPSILON] = 0.0
+        return matrix[:row]
+
+    def deduceComponent(self, cells, clues):
+        """
+        Returns the (safes, mines) lists of cells of one component that follow from the bounds of its reduced rows
+        """
+        position = {cell: index for index, cell in enumerate(cells)}
+        matrix = np.zeros((len(clues), len(cells) + 1))
+        for row, clue in enumerate(clues):
+            matrix[row, [position[cell] for cell in clue.cells]] = 1.0
+            matrix[row, -1] = clue.count
+
+        reduced = self.reduce(matrix)
+        coefficients, counts = reduced[:, :-1], reduced[:, -1]
+        highest = np.clip(coefficients, 0.0, None).sum(axis=1)
+        lowest = np.clip(coefficients, None, 0.0).sum(axis=1)
+        atHighest = np.abs(counts - highest) < EPSILON
+        atLowest = np.abs(counts - lowest) < EPSILON
+
+        # At the highest bound the positive cells are mines and the negative ones safe, at the lowest the reverse
+        positive, negative = coefficients > 0, coefficients < 0
+        mines = (positive & atHighest[:, None]).any(axis=0) | (negative & atLowest[:, None]).any(axis=0)
+        safes = (negative & atHighest[:, None]).any(axis=0) | (positive & atLowest[:, None]).any(axis=0)
+        return ([cells[index] for index in np.flatnonzero(safes & ~mines)],
+                [cells[index] for index in np.flatnonzero(mines & ~safes)])
+
+    def deduce(self, components):
+        """
+        Returns the sets of cells that are certainly safe and certainly mines, given the components of the frontier as
+        (cells, clues) pairs. Details of the run are left in self.stats.
+        """
+        start = time.perf_counter()
+        safes, mines = set(), set()
+        sizes = []
+        for cells, clues in components:
+            if len(clues) < 2:  # a single clue is fully used by propagation already
+                continue
+            sizes.append(len(cells))
+            componentSafes, componentMines = self.deduceComponent(cells, clues)
+            safes.update(componentSafes)
+            mines.update(componentMines)
+
+        elapsed = time.perf_counter() - start
+        self.stats = {"components": len(sizes), "largestComponent": max(sizes, default=0), "safes": len(safes),
+                      "mines": len(mines), "seconds": elapsed}
+        self.totals["calls"] += 1
+        self.totals["seconds"] += elapsed
+        self.totals["largestComponent"] = max(self.totals["largestComponent"], self.stats["largestComponent"])
+        self.totals["safes"] += len(safes)
+        self.totals["mines"] += len(mines)
+        return safes, mines
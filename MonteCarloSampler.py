@@ -0,0 +1,147 @@
+import math
+import multiprocessing
+import random
+import time
+
+
+def runChain(cluesOf, counts, sizes, samples, seconds, seed):
+    """
+    Draw up to samples mine assignments of a component (stopping early once the chain has run for seconds, if not None)
+    and return them in the format of FrontierSolver.enumerate, with the importance weights in place of counts.
+    Cells are assigned in order. For each cell, the values that keep every clue satisfiable (no clue over its count,
+    or unable to reach it) are found and one is picked uniformly. The weight of a completed assignment is the product of
+    the number of values each cell could take, a power of two, which makes the weighted samples an unbiased estimate
+    of the number of solutions. A sample that runs into a dead end has weight zero.
+    """
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + seconds if seconds is not None else None
+    solutions = {}
+    drawn = 0
+    cells = len(cluesOf)
+    while drawn < samples and (deadline is None or time.perf_counter() < deadline):
+        drawn += 1
+        mines = [0] * len(counts)
+        unassigned = list(sizes)
+        assignment = [0] * cells
+        choices = 0  # cells that could take either value
+        total = 0
+        for cell in range(cells):
+            feasible = []
+            for value in (0, 1):
+                if all(mines[index] + value <= counts[index] and
+                       mines[index] + value + unassigned[index] - 1 >= counts[index] for index in cluesOf[cell]):
+                    feasible.append(value)
+            if not feasible:
+                break
+            if len(feasible) == 2:
+                choices += 1
+            value = feasible[0] if len(feasible) == 1 else rng.getrandbits(1)
+            assignment[cell] = value
+            total += value
+            for index in cluesOf[cell]:
+                mines[index] += value
+                unassigned[index] -= 1
+        else:
+            weight = 1 << choices
+            entry = solutions.setdefault(total, [0, [0] * cells])
+            entry[0] += weight
+            cellCounts = entry[1]
+            for cell, value in enumerate(assignment):
+                if value:
+                    cellCounts[cell] += weight
+    return drawn, solutions
+
+
+class MonteCarloSampler():
+    """
+    Estimates the solutions of frontier components that are too large for FrontierSolver to enumerate, by drawing
+    random mine assignments that respect every clue (sequential importance sampling, see runChain).
+    The samples are split over independent chains, run across a pool of worker processes when processes is more than
+    one. Each call draws at most samples assignments and stops after seconds if a time budget is given, which sets the
+    trade-off between accuracy and the time a move takes. The budget is shared out between the chains, so that every
+    chain draws its part of the samples whether the chains run one after another or side by side.
+    The per-chain estimates also give a confidence interval for the probability of every cell (the mean over chains
+    plus or minus 1.96 standard errors), kept in self.bounds.
+    """
+
+    def __init__(self, samples=1000, seconds=None, processes=1, chains=8):
+        self.samples = samples
+        self.seconds = seconds
+        self.processes = processes
+        self.chains = chains
+        self.pool = None
+
+        # Confidence interval (low, high) of the mine probability of every sampled cell, from the last call to sample
+        self.bounds = {}
+
+        # Running totals over every call to sample
+        self.totals = {"calls": 0, "samples": 0, "seconds": 0.0}
+
+    def close(self):
+        """
+        Stop the worker processes, if any were started
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def sample(self, cells, clues, rng=random):
+        """
+        Returns estimated solutions of the component, in the format of FrontierSolver.enumerate: a dictionary mapping
+        each number of mines to (weight, list of the weight of the samples in which each cell is a mine)
+        """
+        start = time.perf_counter()
+        position = {cell: index for index, cell in enumerate(cells)}
+        cluesOf = [[] for _ in cells]
+        for index, clue in enumerate(clues):
+            for cell in clue.cells:
+                cluesOf[position[cell]].append(index)
+        counts = [clue.count for clue in clues]
+        sizes = [len(clue.cells) for clue in clues]
+
+        share = -(-self.samples // self.chains)
+        # Chains run self.processes at a time, so each one gets the time of its wave
+        seconds = self.seconds * min(self.processes, self.chains) / self.chains if self.seconds is not None else None
+        jobs = [(cluesOf, counts, sizes, share, seconds, rng.getrandbits(64)) for _ in range(self.chains)]
+        if self.processes == 1:
+            results = [runChain(*job) for job in jobs]
+        else:
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(self.processes)
+            results = self.pool.starmap(runChain, jobs)
+
+        solutions = {}
+        for _, chainSolutions in results:
+            for total, (weight, cellCounts) in chainSolutions.items():
+                entry = solutions.setdefault(total, [0, [0] * len(cells)])
+                entry[0] += weight
+                entry[1] = [a + b for a, b in zip(entry[1], cellCounts)]
+        self.bounds = self.intervals(cells, [chainSolutions for _, chainSolutions in results])
+
+        self.totals["calls"] += 1
+        self.totals["samples"] += sum(drawn for drawn, _ in results)
+        self.totals["seconds"] += time.perf_counter() - start
+        return {total: (weight, cellCounts) for total, (weight, cellCounts) in solutions.items()}
+
+    def intervals(self, cells, chains):
+        """
+        Returns the 95% confidence interval of the mine probability of every cell, from the spread of the estimates of
+        the chains that drew at least one complete assignment
+        """
+        estimates = []
+        for solutions in chains:
+            weight = sum(total for total, _ in solutions.values())
+            if weight:
+                estimates.append([sum(cellCounts[index] for _, cellCounts in solutions.values()) / weight
+                                  for index in range(len(cells))])
+        bounds = {}
+        for index, cell in enumerate(cells):
+            values = [estimate[index] for estimate in estimates]
+            if len(values) < 2:
+                bounds[cell] = (0.0, 1.0)
+                continue
+            mean = sum(values) / len(values)
+            error = 1.96 * math.sqrt(sum((value - mean) ** 2 for value in values) / (len(values) - 1) / len(values))
+            bounds[cell] = (max(0.0, mean - error), min(1.0, mean + error))
+        return bounds
@@ -0,0 +1,105 @@
+import json
+
+import numpy as np
+
+import ChunkedEnvironment
+import Environment
+
+
+class MoveLog():
+    """
+    The record of one game: the parameters needed to build the same board and agent again (agent type and options,
+    board dimensions, mines, seed, safe first cell or chunk size) and every move played with its outcome, either a
+    triggered mine or the (cell, clue) pairs of the cells the move opened.
+    A log is saved as a compressed numpy archive holding the moves as linear cell indices (row * width + column), a
+    flag per move telling whether it hit a mine, and the opened cells and their clues as flat arrays with one offset per
+    move, which takes a few bytes per move.
+    """
+
+    def __init__(self, agent, height, width, mines, seed, options=None, safeCell=None, chunkSize=None):
+        self.header = {"agent": agent, "options": options or {}, "height": height, "width": width, "mines": mines,
+                       "seed": seed, "safeCell": safeCell, "chunkSize": chunkSize}
+        self.width = width
+
+        self.moves = []  # linear index of the cell played by each move
+        self.mines = []  # whether each move triggered a mine
+        self.offsets = [0]  # the cells opened by move k are openedCells[offsets[k]:offsets[k + 1]]
+        self.openedCells = []  # linear index of every cell opened, move after move
+        self.openedClues = []  # clue of every cell opened
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __iter__(self):
+        """
+        Yields (cell, opened) for every move, where opened is None if the move triggered a mine and otherwise the list
+        of (cell, clue) pairs it opened
+        """
+        for k, index in enumerate(self.moves):
+            cell = divmod(index, self.width)
+            if self.mines[k]:
+                yield cell, None
+            else:
+                start, stop = self.offsets[k], self.offsets[k + 1]
+                yield cell, [(divmod(opened, self.width), clue)
+                             for opened, clue in zip(self.openedCells[start:stop], self.openedClues[start:stop])]
+
+    def reveal(self, cell, opened):
+        """
+        Record a move that revealed a safe cell, with the (cell, clue) pairs it opened (see Environment.floodReveal)
+        """
+        self.moves.append(cell[0] * self.width + cell[1])
+        self.mines.append(False)
+        for (i, j), clue in opened:
+            self.openedCells.append(i * self.width + j)
+            self.openedClues.append(clue)
+        self.offsets.append(len(self.openedCells))
+
+    def mine(self, cell):
+        """
+        Record a move that triggered a mine
+        """
+        self.moves.append(cell[0] * self.width + cell[1])
+        self.mines.append(True)
+        self.offsets.append(len(self.openedCells))
+
+    def save(self, path):
+        """
+        Write the log to a file
+        """
+        with open(path, "wb") as file:
+            np.savez_compressed(file,
+                                header=np.frombuffer(json.dumps(self.header).encode(), dtype=np.uint8),
+                                moves=np.array(self.moves, dtype=np.int64),
+                                mines=np.array(self.mines, dtype=bool),
+                                offsets=np.array(self.offsets, dtype=np.int64),
+                                openedCells=np.array(self.openedCells, dtype=np.int64),
+                                openedClues=np.array(self.openedClues, dtype=np.uint8))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a log written by save
+        """
+        with np.load(path) as archive:
+            header = json.loads(archive["header"].tobytes())
+            log = cls(header["agent"], header["height"], header["width"], header["mines"], header["seed"],
+                      header["options"], header["safeCell"], header["chunkSize"])
+            log.moves = archive["moves"].tolist()
+            log.mines = archive["mines"].tolist()
+            log.offsets = archive["offsets"].tolist()
+            log.openedCells = archive["openedCells"].tolist()
+            log.openedClues = archive["openedClues"].tolist()
+        return log
+
+    def environment(self):
+        """
+        Build the board the game was played on again from its seed
+        """
+        header = self.header
+        if header["chunkSize"] is not None:
+            return ChunkedEnvironment.ChunkedEnvironment(header["height"], header["width"], header["mines"],
+                                                         seed=header["seed"], chunkSize=header["chunkSize"])
+        safeCell = tuple(header["safeCell"]) if header["safeCell"] is not None else None
+        return Environment.Environment(header["height"], header["width"], header["mines"], seed=header["seed"],
+                                       safeCell=safeCell)
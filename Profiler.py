@@ -0,0 +1,109 @@
+import collections
+import json
+import time
+
+
+class Profiler():
+    """
+    Collects wall time and call counts per phase of an agent (add_knowledge_many, updateKnowledgeBase, newInferences,
+    SimplifyKnowledgeBase, MarkMine, MarkSafe), together with counters such as subset comparisons, inferences and cells
+    marked.
+    An agent given a profiler wraps its phase methods with wrap() (and the method making a move with wrapMove()) when it
+    is built, so an agent without a profiler runs its plain methods and pays nothing. Phases nest (the marks happen
+    inside updateKnowledgeBase), so the time of a phase includes the time of the phases it calls.
+    Each call to endMove closes a per-move snapshot, the most recent of which are kept in a bounded buffer, and adds it
+    to the totals of the game returned by snapshot().
+    """
+
+    def __init__(self, capacity=10000):
+        self.moves = collections.deque(maxlen=capacity)  # per-move snapshots, oldest first
+        self.moveCount = 0
+
+        # phase -> [calls, seconds], and counter -> value, for the current move and for the whole game
+        self.phases = {}
+        self.counters = {}
+        self.totalPhases = {}
+        self.totalCounters = {}
+        self.gauges = {}  # gauge -> largest value seen over the game
+
+    def wrap(self, phase, function):
+        """
+        Returns a function that calls the given one and records its wall time under the phase
+        """
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record = self.phases.get(phase)
+                if record is None:
+                    record = self.phases[phase] = [0, 0.0]
+                record[0] += 1
+                record[1] += time.perf_counter() - start
+        return timed
+
+    def wrapMove(self, phase, function, gauges):
+        """
+        Same as wrap, for the function that makes one move: once it returns, the move is closed with endMove, using the
+        gauges returned by calling gauges()
+        """
+        timed = self.wrap(phase, function)
+
+        def move(*args, **kwargs):
+            try:
+                return timed(*args, **kwargs)
+            finally:
+                self.endMove(**gauges())
+        return move
+
+    def count(self, counter, amount=1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def endMove(self, **gauges):
+        """
+        Close the snapshot of the current move. Gauges are values measured at the end of the move (such as the size of
+        the knowledge base); the snapshot of the game keeps the largest value of each.
+        Returns the snapshot of the move.
+        """
+        snapshot = {
+            "move": self.moveCount,
+            "phases": {phase: {"calls": calls, "seconds": seconds} for phase, (calls, seconds) in self.phases.items()},
+            "counters": dict(self.counters),
+        }
+        snapshot.update(gauges)
+        self.moves.append(snapshot)
+        self.moveCount += 1
+
+        for phase, (calls, seconds) in self.phases.items():
+            total = self.totalPhases.setdefault(phase, [0, 0.0])
+            total[0] += calls
+            total[1] += seconds
+        for counter, value in self.counters.items():
+            self.totalCounters[counter] = self.totalCounters.get(counter, 0) + value
+        for gauge, value in gauges.items():
+            self.gauges[gauge] = max(value, self.gauges.get(gauge, value))
+        self.phases = {}
+        self.counters = {}
+        return snapshot
+
+    def snapshot(self):
+        """
+        Returns the totals of the game so far: calls and seconds per phase, counters, and the largest value of each gauge
+        """
+        return {
+            "moves": self.moveCount,
+            "phases": {phase: {"calls": calls, "seconds": seconds}
+                       for phase, (calls, seconds) in self.totalPhases.items()},
+            "counters": dict(self.totalCounters),
+            "max": dict(self.gauges),
+        }
+
+    def dump(self, path, moves=True):
+        """
+        Write the game snapshot, and optionally the per-move snapshots still in the buffer, to a JSON file
+        """
+        data = self.snapshot()
+        if moves:
+            data["perMove"] = list(self.moves)
+        with open(path, "w") as file:
+            json.dump(data, file, indent=2)
@@ -0,0 +1,112 @@
+import pygame
+
+# Colors
+GRAY = (180, 180, 180)
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+
+
+class BoardRenderer():
+    """
+    Draws the Minesweeper board for the gameplay scripts.
+    Every cell image (blank, the digits 0-8, flag and mine) is rendered once up front. The board lives on a persistent
+    surface, and each update only redraws the cells whose state changed since the last one and returns the screen
+    rectangles they cover, so only those need to be pushed to the display.
+    """
+
+    def __init__(self, height, width, origin, cellSize, font, flag, mine):
+        self.height = height
+        self.width = width
+        self.origin = origin
+        self.cellSize = cellSize
+
+        # Pre-render every cell image: a gray cell with a white border, with a digit, flag or mine on top
+        blank = pygame.Surface((cellSize, cellSize))
+        blank.fill(GRAY)
+        pygame.draw.rect(blank, WHITE, blank.get_rect(), 3)
+        self.glyphs = {None: blank, "flag": self.onCell(blank, flag), "mine": self.onCell(blank, mine)}
+        for count in range(9):
+            self.glyphs[count] = self.onCell(blank, font.render(str(count), True, BLACK))
+
+        # The board surface starts with every cell blank
+        self.surface = pygame.Surface((width * cellSize, height * cellSize))
+        for i in range(height):
+            for j in range(width):
+                self.surface.blit(blank, (j * cellSize, i * cellSize))
+        self.drawn = {}  # cell -> glyph currently drawn on the board surface, for every cell that is not blank
+
+    @staticmethod
+    def onCell(blank, image):
+        cell = blank.copy()
+        rect = image.get_rect()
+        rect.center = cell.get_rect().center
+        cell.blit(image, rect)
+        return cell
+
+    def cellRect(self, cell):
+        """
+        Returns the rectangle covered by the cell on the screen
+        """
+        i, j = cell
+        return pygame.Rect(
+            self.origin[0] + j * self.cellSize,
+            self.origin[1] + i * self.cellSize,
+            self.cellSize, self.cellSize
+        )
+
+    def cellAt(self, position):
+        """
+        Returns the cell under a screen position, or None if the position is outside the board. This is plain arithmetic
+        on the board origin and cell size, so it takes the same time whatever the size of the board.
+        """
+        j = (position[0] - self.origin[0]) // self.cellSize
+        i = (position[1] - self.origin[1]) // self.cellSize
+        if 0 <= i < self.height and 0 <= j < self.width:
+            return (i, j)
+        return None
+
+    def glyph(self, cell, game, revealed, flags, triggered_mines, lost):
+        """
+        Returns which image the cell should show, following the rules of the gameplay scripts
+        """
+        if lost and game.is_mine(cell):
+            return "mine"
+        elif cell in flags:
+            # display triggered mine
+            return "mine" if cell in triggered_mines else "flag"
+        elif cell in revealed:
+            return game.mineNeighbor(cell)
+        return None
+
+    def update(self, screen, game, revealed, flags, triggered_mines, lost):
+        """
+        Redraw the cells whose image changed, both on the board surface and on the screen. Returns the list of screen
+        rectangles that changed, to be passed to pygame.display.update.
+        """
+        candidates = set(self.drawn).union(revealed, flags)
+        if lost:
+            candidates.update(game.mines)
+
+        dirty = []
+        for cell in candidates:
+            glyph = self.glyph(cell, game, revealed, flags, triggered_mines, lost)
+            if self.drawn.get(cell) == glyph:
+                continue
+            if glyph is None:
+                del self.drawn[cell]
+            else:
+                self.drawn[cell] = glyph
+
+            image = self.glyphs[glyph]
+            i, j = cell
+            self.surface.blit(image, (j * self.cellSize, i * self.cellSize))
+            rect = self.cellRect(cell)
+            screen.blit(image, rect)
+            dirty.append(rect)
+        return dirty
+
+    def draw(self, screen):
+        """
+        Copy the whole board onto the screen (after the screen was cleared). Returns the rectangle it covers.
+        """
+        return screen.blit(self.surface, self.origin)
@@ -0,0 +1,82 @@
+import argparse
+import time
+
+import MoveLog
+import Profiler
+import Simulation
+
+
+def replay(log, stop=None, timed=False, tracer=None, profiler=None, check=False):
+    """
+    Play a recorded game again on a fresh agent, as fast as possible: every move is fed straight to the agent
+    (add_knowledge_many for the cells it opened, MarkMine for a triggered mine) without a board, a window or any choice
+    of move. The agent ends up in the state it was in after the same moves of the original game.
+    With stop, only the first stop moves are replayed. With timed, the wall time of every move is measured. With check,
+    the board is generated again from the seed and every recorded outcome is compared with it, which raises ValueError
+    on the first mismatch.
+    Returns the agent and the list of per-move seconds (None unless timed).
+    """
+    header = log.header
+    options = dict(header["options"], tracer=tracer, profiler=profiler)
+    ai = Simulation.makeAgent(header["agent"], header["height"], header["width"], options)
+    game = log.environment() if check else None
+
+    seconds = [] if timed else None
+    for k, (cell, opened) in enumerate(log):
+        if stop is not None and k >= stop:
+            break
+        if game is not None and not matches(game, cell, opened):
+            raise ValueError(f"Move {k} at {cell} does not match the board generated from seed {header['seed']}")
+
+        if timed:
+            start = time.perf_counter()
+        if opened is None:
+            ai.MarkMine(cell)
+        else:
+            ai.add_knowledge_many(opened)
+        if timed:
+            seconds.append(time.perf_counter() - start)
+    return ai, seconds
+
+
+def matches(game, cell, opened):
+    """
+    Returns True if the recorded outcome of playing the cell (None for a mine, or the opened (cell, clue) pairs) agrees
+    with the board
+    """
+    if opened is None:
+        return game.is_mine(cell)
+    return not game.is_mine(cell) and all(game.mineNeighbor(other) == clue for other, clue in opened)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded Minesweeper game through its agent")
+    parser.add_argument("log", help="move log written by Simulation.py --record or the gameplay scripts")
+    parser.add_argument("--stop", type=int, default=None, help="only replay the first STOP moves")
+    parser.add_argument("--slowest", type=int, default=10, help="number of slowest moves to list")
+    parser.add_argument("--check", action="store_true",
+                        help="generate the board again from its seed and check every recorded outcome against it")
+    parser.add_argument("--profile", default=None, help="profile the phases of the agent and write them as JSON")
+    args = parser.parse_args(argv)
+
+    log = MoveLog.MoveLog.load(args.log)
+    header = log.header
+    profiler = Profiler.Profiler() if args.profile else None
+    ai, seconds = replay(log, stop=args.stop, timed=True, profiler=profiler, check=args.check)
+
+    total = sum(seconds)
+    print(f"Game: {header['agent']} on {header['height']}x{header['width']}, {header['mines']} mines, "
+          f"seed {header['seed']}")
+    print(f"Replayed {len(seconds)} of {len(log)} moves in {total:.3f}s "
+          f"({len(seconds) / total if total else 0.0:.1f} moves per second)")
+    print(f"Known mines: {len(ai.mineSet)}, cells played: {len(ai.track_moves)}, clues: {len(ai.knowledgeBase)}")
+    if seconds:
+        print("Slowest moves:")
+        for k in sorted(range(len(seconds)), key=seconds.__getitem__, reverse=True)[:args.slowest]:
+            print(f"\tmove {k} at {divmod(log.moves[k], log.width)}: {1000 * seconds[k]:.3f} ms")
+    if profiler is not None:
+        profiler.dump(args.profile)
+
+
+if __name__ == "__main__":
+    main()
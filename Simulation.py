@@ -0,0 +1,229 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+
+import BasicAgent
+import ChunkedEnvironment
+import Environment
+import ImprovedAgent
+import MoveLog
+import Profiler
+
+AGENTS = {
+    "basic": BasicAgent.BasicAgent,
+    "improved": ImprovedAgent.ImprovedAgent,
+}
+
+
+def makeAgent(agent, height, width, options=None):
+    """
+    Build a fresh agent of the given type ("basic" or "improved") for a board of the given dimensions. Options are
+    passed on to the agent's constructor.
+    """
+    return AGENTS[agent](height=height, width=width, **(options or {}))
+
+
+def chooseMove(ai):
+    """
+    Pick the next move exactly like the "AI Move" button of the gameplay scripts: a safe move if one is known,
+    otherwise a random one. Returns None when there are no moves left to make.
+    """
+    move = ai.move_safely()
+    if move is None:
+        move = ai.move_randomly()
+    return move
+
+
+def playGame(agent, height, width, mines, seed, options=None, firstClickSafe=False, profile=False, chunkSize=None,
+             record=None):
+    """
+    Play one complete game headlessly and return a dictionary describing the result.
+    The seed drives both the board layout and the random moves of the agent, so a game can be reproduced.
+    With firstClickSafe the agent picks its first move before the board is generated, and the board keeps that cell
+    and its neighbors free of mines.
+    As in the gameplay scripts, triggering a mine does not end the game: the agent marks it and keeps going until it
+    has no moves left. A game is won when no mine was triggered.
+    With profile the agent gets a Profiler, and the result includes its snapshot of the game.
+    With chunkSize the board is a ChunkedEnvironment, generated chunk by chunk as the agent explores it.
+    With record (a directory), the moves of the game are saved there as a MoveLog named after the agent and the seed.
+    """
+    random.seed(seed)
+    profiler = Profiler.Profiler(capacity=0) if profile else None
+    ai = makeAgent(agent, height, width, dict(options or {}, profiler=profiler) if profile else options)
+    firstMove = chooseMove(ai) if firstClickSafe else None
+    if chunkSize is None:
+        game = Environment.Environment(height=height, width=width, mines=mines, seed=seed, safeCell=firstMove)
+    else:
+        game = ChunkedEnvironment.ChunkedEnvironment(height=height, width=width, mines=mines, seed=seed,
+                                                     chunkSize=chunkSize)
+    log = MoveLog.MoveLog(agent, height, width, mines, seed, options, firstMove, chunkSize) if record else None
+
+    revealed = set()
+    triggered_mines = set()
+    moves = 0
+
+    start = time.perf_counter()
+    while True:
+        move = firstMove if firstMove is not None else chooseMove(ai)
+        firstMove = None
+        if move is None:
+            break
+
+        # Moves that were already played do not change the game
+        if move in revealed or move in triggered_mines:
+            continue
+
+        moves += 1
+        if game.is_mine(move):
+            ai.MarkMine(move)
+            triggered_mines.add(move)
+            if log is not None:
+                log.mine(move)
+        else:
+            # Revealing a cell without neighboring mines opens the whole empty region around it at once
+            opened = game.floodReveal(move, revealed)
+            revealed.update(cell for cell, _ in opened)
+            ai.add_knowledge_many(opened)
+            if log is not None:
+                log.reveal(move, opened)
+    elapsed = time.perf_counter() - start
+    if log is not None:
+        log.save(os.path.join(record, f"{agent}-{seed}.movelog"))
+
+    result = {
+        "agent": agent,
+        "seed": seed,
+        "won": len(triggered_mines) == 0,
+        "mines_triggered": len(triggered_mines),
+        "moves": moves,
+        "seconds": elapsed,
+    }
+    if hasattr(ai, "solver"):
+        result["solver"] = dict(ai.solver.totals)
+        ai.close()
+    if profiler is not None:
+        result["profile"] = profiler.snapshot()
+    return result
+
+
+def runGames(agent, height, width, mines, seeds, processes=None, options=None, firstClickSafe=False, profile=False,
+             chunkSize=None, record=None):
+    """
+    Play one game per seed for the given agent, spread over a pool of worker processes (all cores by default).
+    Returns the list of per-game results in seed order.
+    """
+    jobs = [(agent, height, width, mines, seed, options, firstClickSafe, profile, chunkSize, record) for seed in seeds]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.starmap(playGame, jobs, chunksize=max(1, len(jobs) // (4 * (processes or os.cpu_count() or 1))))
+
+
+def summarize(results, wallTime):
+    """
+    Aggregate the per-game results of one agent into win rate, mines triggered and throughput
+    """
+    games = len(results)
+    moves = sum(result["moves"] for result in results)
+    summary = {
+        "games": games,
+        "win_rate": sum(result["won"] for result in results) / games if games else 0.0,
+        "mines_triggered": sum(result["mines_triggered"] for result in results),
+        "mines_triggered_per_game": sum(result["mines_triggered"] for result in results) / games if games else 0.0,
+        "moves": moves,
+        "moves_per_second": moves / wallTime if wallTime else 0.0,
+        "wall_seconds": wallTime,
+    }
+    solvers = [result["solver"] for result in results if "solver" in result and result["solver"]["calls"]]
+    if solvers:
+        calls = sum(solver["calls"] for solver in solvers)
+        summary["solver"] = {
+            "calls": calls,
+            "mean_ms": 1000 * sum(solver["seconds"] for solver in solvers) / calls,
+            "largest_component": max(solver["largestComponent"] for solver in solvers),
+            "skipped_components": sum(solver["skippedComponents"] for solver in solvers),
+            "sampled_components": sum(solver["sampledComponents"] for solver in solvers),
+        }
+    return summary
+
+
+def parseSeeds(text):
+    """
+    Parse a seed range given as "start:stop" (stop excluded) or a single number of games starting at seed 0
+    """
+    if ":" in text:
+        start, stop = text.split(":")
+        return range(int(start), int(stop))
+    return range(int(text))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many headless Minesweeper games per agent and report statistics")
+    parser.add_argument("--agent", nargs="+", choices=sorted(AGENTS), default=sorted(AGENTS))
+    parser.add_argument("--height", type=int, default=50)
+    parser.add_argument("--width", type=int, default=50)
+    parser.add_argument("--mines", type=int, default=100)
+    parser.add_argument("--seeds", type=parseSeeds, default=parseSeeds("0:1000"),
+                        help="seed range start:stop, or a number of games starting at seed 0")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--safe-first", action="store_true",
+                        help="generate each board so that the agent's first move and its neighbors have no mines")
+    parser.add_argument("--guess", choices=["random", "exact"], default="random",
+                        help="how the improved agent guesses when no safe move is known")
+    parser.add_argument("--inference", choices=["subset", "matrix"], default="subset",
+                        help="how the improved agent combines clues (matrix adds Gaussian elimination)")
+    parser.add_argument("--mine-count", action="store_true",
+                        help="tell the agents the total number of mines, to use as a global constraint")
+    parser.add_argument("--max-component", type=int, default=40,
+                        help="largest frontier component the exact solver enumerates")
+    parser.add_argument("--samples", type=int, default=0,
+                        help="estimate frontier components larger than --max-component from this many random samples")
+    parser.add_argument("--sample-seconds", type=float, default=None, help="time budget of the sampler per component")
+    parser.add_argument("--profile", default=None,
+                        help="profile the phases of every game and write the per-game snapshots as JSON to this file")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="play on a ChunkedEnvironment with chunks of this size, generated as they are explored")
+    parser.add_argument("--record", default=None,
+                        help="directory to save the move log of every game to, to be played again with Replay.py")
+    args = parser.parse_args(argv)
+    if args.chunk_size is not None and args.safe_first:
+        parser.error("--safe-first is not supported with --chunk-size")
+    options = {"basic": {}, "improved": {"guess": args.guess, "maxComponentSize": args.max_component,
+                                         "inference": args.inference, "samples": args.samples,
+                                         "sampleSeconds": args.sample_seconds}}
+    if args.mine_count:
+        for agentOptions in options.values():
+            agentOptions["mines"] = args.mines
+
+    print(f"Board: {args.height}x{args.width}, {args.mines} mines, seeds {args.seeds.start}:{args.seeds.stop}")
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+    profiles = {}
+    for agent in args.agent:
+        start = time.perf_counter()
+        results = runGames(agent, args.height, args.width, args.mines, args.seeds, args.processes, options.get(agent),
+                           args.safe_first, args.profile is not None, args.chunk_size, args.record)
+        summary = summarize(results, time.perf_counter() - start)
+        print(f"\n{agent}:")
+        print(f"\tGames played:      {summary['games']}")
+        print(f"\tWin rate:          {summary['win_rate']:.2%}")
+        print(f"\tMines triggered:   {summary['mines_triggered']} ({summary['mines_triggered_per_game']:.2f} per game)")
+        print(f"\tMoves per second:  {summary['moves_per_second']:.1f}")
+        print(f"\tWall time:         {summary['wall_seconds']:.2f}s")
+        if "solver" in summary:
+            solver = summary["solver"]
+            print(f"\tSolver calls:      {solver['calls']} ({solver['mean_ms']:.2f} ms each)")
+            print(f"\tLargest component: {solver['largest_component']} cells "
+                  f"(cap {args.max_component}, {solver['skipped_components']} skipped, "
+                  f"{solver['sampled_components']} sampled)")
+        if args.profile:
+            profiles[agent] = [dict(result["profile"], seed=result["seed"]) for result in results]
+
+    if args.profile:
+        with open(args.profile, "w") as file:
+            json.dump(profiles, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
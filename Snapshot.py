@@ -0,0 +1,195 @@
+import json
+import mmap
+import struct
+
+import numpy as np
+
+import BasicAgent
+import ChunkedEnvironment
+import Clue
+import Environment
+import ImprovedAgent
+
+# A snapshot file starts with the magic bytes, the format version and the length of a JSON header. The header describes
+# the game and the agent and gives the offset, type and length of every array. The arrays follow, each starting on an
+# ALIGNMENT byte boundary, stored exactly as they are laid out in memory so that loading only has to map them.
+MAGIC = b"MSWPSNAP"
+VERSION = 1
+PREFIX = struct.Struct("<8sII")
+ALIGNMENT = 64
+
+AGENTS = {
+    "BasicAgent": BasicAgent.BasicAgent,
+    "ImprovedAgent": ImprovedAgent.ImprovedAgent,
+}
+
+
+def gameState(game):
+    """
+    Returns the header entry and the arrays describing an environment. A ChunkedEnvironment is described by its
+    parameters alone, since its chunks are generated again from the seed.
+    """
+    if isinstance(game, ChunkedEnvironment.ChunkedEnvironment):
+        header = {"type": "ChunkedEnvironment", "height": game.height, "width": game.width, "mines": game.mineCount,
+                  "seed": game.seed, "chunkSize": game.chunkSize, "maxChunks": game.maxChunks}
+        return header, {}
+    header = {"type": "Environment", "height": game.height, "width": game.width}
+    return header, {"board": game.board, "clues": game.clues}
+
+
+def agentState(ai):
+    """
+    Returns the header entry and the arrays describing an agent: its cell grid, its pool of unknown cells, its queue of
+    safe moves and its knowledge base, with the clues on the worklist and the clues changed since the last inference
+    given as positions in the knowledge base
+    """
+    header = {"type": type(ai).__name__, "height": ai.height, "width": ai.width, "poolSize": ai.unknownCells.size,
+              "options": {"mines": ai.mines}}
+    if isinstance(ai, ImprovedAgent.ImprovedAgent):
+        header["options"].update(guess=ai.guess, maxComponentSize=ai.solver.maxComponentSize, bitmask=ai.bitmask,
+                                 inference=ai.inference)
+        sampler = ai.solver.sampler
+        if sampler is not None:
+            header["options"].update(samples=sampler.samples, sampleSeconds=sampler.seconds,
+                                     sampleProcesses=sampler.processes)
+
+    width = ai.width
+    knowledgeBase = ai.knowledgeBase
+    clues = knowledgeBase.copy()
+    position = {id(clue): index for index, clue in enumerate(clues)}
+    sizes = np.fromiter((len(clue.cells) for clue in clues), dtype=np.int64, count=len(clues))
+    worklist = [clue for clue in knowledgeBase.worklist if knowledgeBase.queued.get(id(clue)) is clue]
+
+    arrays = {
+        "cells": np.frombuffer(ai.cellGrid.cells, dtype=np.uint8),
+        "poolItems": np.asarray(ai.unknownCells.items),
+        "poolPositions": np.asarray(ai.unknownCells.positions),
+        "safeQueue": np.array([i * width + j for i, j in ai.safeQueue], dtype=np.int64),
+        "clueCounts": np.array([clue.count for clue in clues], dtype=np.int64),
+        "clueOffsets": np.concatenate(([0], np.cumsum(sizes))).astype(np.int64),
+        "clueCells": np.array([i * width + j for clue in clues for i, j in clue.cells], dtype=np.int64),
+        "worklist": np.array([position[id(clue)] for clue in worklist], dtype=np.int64),
+        "changed": np.array([position[id(clue)] for clue in knowledgeBase.changed.values()], dtype=np.int64),
+    }
+    return header, arrays
+
+
+def save(path, game=None, ai=None):
+    """
+    Write the environment and/or the agent to a snapshot file. The agent should be saved between moves; the tracer and
+    the profiler are not part of the snapshot.
+    """
+    header = {"arrays": {}}
+    arrays = {}
+    for name, state, value in (("game", gameState, game), ("agent", agentState, ai)):
+        if value is not None:
+            header[name], parts = state(value)
+            arrays.update({f"{name}.{key}": np.ascontiguousarray(array) for key, array in parts.items()})
+
+    # The offsets depend on the length of the header, which itself holds the offsets: lay the arrays out after a header
+    # that is padded to a round size, and grow the padding until the header fits
+    reserved = ALIGNMENT
+    while True:
+        offset = align(PREFIX.size + reserved)
+        for key, array in arrays.items():
+            header["arrays"][key] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            offset = align(offset + array.nbytes)
+        encoded = json.dumps(header).encode()
+        if len(encoded) <= reserved:
+            break
+        reserved *= 2
+
+    with open(path, "wb") as file:
+        file.write(PREFIX.pack(MAGIC, VERSION, len(encoded)))
+        file.write(encoded)
+        for key, array in arrays.items():
+            file.write(b"\0" * (header["arrays"][key]["offset"] - file.tell()))
+            file.write(memoryview(array).cast("B"))
+
+
+def align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class Snapshot():
+    """
+    A snapshot file mapped into memory. The file is mapped copy-on-write, so the arrays are read straight from the page
+    cache and a restored game can be played on without changing the file: only the pages it writes to are copied.
+    Many processes can restore the same snapshot and share every page they only read.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, length = PREFIX.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Minesweeper snapshot")
+        if version != VERSION:
+            raise ValueError(f"{path} is a version {version} snapshot, expected version {VERSION}")
+        self.header = json.loads(self.buffer[PREFIX.size:PREFIX.size + length])
+
+    def array(self, key):
+        """
+        Returns a numpy view of an array of the snapshot
+        """
+        entry = self.header["arrays"][key]
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"]))
+        return np.frombuffer(self.buffer, dtype=dtype, count=count, offset=entry["offset"]).reshape(entry["shape"])
+
+    def memory(self, key, typecode):
+        """
+        Returns a writable memoryview of an array of the snapshot, which is faster than numpy to index one item at a time
+        """
+        entry = self.header["arrays"][key]
+        nbytes = int(np.prod(entry["shape"])) * np.dtype(entry["dtype"]).itemsize
+        return memoryview(self.buffer)[entry["offset"]:entry["offset"] + nbytes].cast(typecode)
+
+    def game(self):
+        """
+        Returns the environment of the snapshot, or None if it has none
+        """
+        header = self.header.get("game")
+        if header is None:
+            return None
+        if header["type"] == "ChunkedEnvironment":
+            game = ChunkedEnvironment.ChunkedEnvironment(header["height"], header["width"], header["mines"],
+                                                         seed=header["seed"], chunkSize=header["chunkSize"])
+            game.maxChunks = header["maxChunks"]
+            return game
+        return Environment.Environment.fromArrays(self.array("game.board"), self.array("game.clues"))
+
+    def agent(self, tracer=None, profiler=None):
+        """
+        Returns the agent of the snapshot, or None if it has none. The agent continues exactly where it was saved.
+        """
+        header = self.header.get("agent")
+        if header is None:
+            return None
+        height, width = header["height"], header["width"]
+        ai = AGENTS[header["type"]](height=height, width=width, tracer=tracer, profiler=profiler,
+                                    **header.get("options", {}))
+
+        ai.cellGrid.load(self.memory("agent.cells", "B"))
+        typecode = "i" if np.dtype(self.header["arrays"]["agent.poolItems"]["dtype"]).itemsize == 4 else "q"
+        ai.unknownCells.load(header["poolSize"], self.memory("agent.poolItems", typecode),
+                             self.memory("agent.poolPositions", typecode))
+        ai.safeQueue.extend(divmod(index, width) for index in self.array("agent.safeQueue").tolist())
+
+        makeClue = getattr(ai, "makeClue", Clue.Clue)
+        counts = self.array("agent.clueCounts").tolist()
+        offsets = self.array("agent.clueOffsets").tolist()
+        cells = self.array("agent.clueCells").tolist()
+        clues = [makeClue([divmod(index, width) for index in cells[offsets[k]:offsets[k + 1]]], count)
+                 for k, count in enumerate(counts)]
+        ai.knowledgeBase.Restore(clues, [clues[k] for k in self.array("agent.worklist").tolist()],
+                                 [clues[k] for k in self.array("agent.changed").tolist()])
+        return ai
+
+
+def load(path, tracer=None, profiler=None):
+    """
+    Map a snapshot file and return its (environment, agent), either of which is None if it was not saved
+    """
+    snapshot = Snapshot(path)
+    return snapshot.game(), snapshot.agent(tracer=tracer, profiler=profiler)
@@ -0,0 +1,67 @@
+import collections
+import json
+
+# Trace levels, from least to most detailed. An event is recorded when its level is at most the tracer's level.
+OFF = 0
+MOVES = 1  # moves made by the agent, and when it has no safe move
+KNOWLEDGE = 2  # clues added to the knowledge base and inferences derived from them
+MARKS = 3  # every cell marked as safe or as a mine
+STATE = 4  # a full dump of the knowledge base, safe cells and mine cells after every move
+
+
+class Tracer():
+    """
+    Collects the events reported by an agent (move made, clue added, inference derived, cell marked, ...).
+    The most recent events are kept in a bounded in-memory ring buffer. Every event can also be written to a JSON-lines
+    sink (a path or an open file) and echoed to the terminal.
+    The agents only build an event when its level is enabled, so a tracer at level OFF (or no tracer at all) costs
+    nothing.
+    """
+
+    def __init__(self, level=MOVES, capacity=10000, sink=None, echo=False):
+        self.level = level
+        self.events = collections.deque(maxlen=capacity)  # ring buffer of the most recent events
+        self.echo = echo
+        self.count = 0  # number of events emitted so far
+
+        # A path is opened (and later closed) by the tracer, an open file is only written to
+        self.ownsSink = isinstance(sink, str)
+        self.sink = open(sink, "w") if self.ownsSink else sink
+
+    def enabled(self, level):
+        return level <= self.level
+
+    def emit(self, event, **fields):
+        """
+        Record an event. Fields must be JSON serializable; single cells can be passed as (row, col) tuples and
+        collections of cells should go through cells() first.
+        """
+        record = {"seq": self.count, "event": event}
+        record.update(fields)
+        self.count += 1
+        self.events.append(record)
+        if self.sink is not None:
+            self.sink.write(json.dumps(record) + "\n")
+        if self.echo:
+            print(event + ": " + ", ".join(f"{name}={value}" for name, value in fields.items()))
+
+    def recent(self, event=None):
+        """
+        Returns the events still in the ring buffer, oldest first, optionally only those of one kind
+        """
+        return [record for record in self.events if event is None or record["event"] == event]
+
+    def close(self):
+        if self.sink is not None:
+            if self.ownsSink:
+                self.sink.close()
+            else:
+                self.sink.flush()
+            self.sink = None
+
+
+def cells(collection):
+    """
+    Returns the cells as a sorted list of [row, col] pairs, the form in which they are stored in events
+    """
+    return [list(cell) for cell in sorted(collection)]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+import BatchEnvironment
+import Environment
+
+
+@pytest.mark.parametrize("mines", [5, 30])  # sparse boards sample the mines, dense boards the safe cells
+def test_boards_match_environment(mines):
+    batch = BatchEnvironment.BatchEnvironment(16, height=6, width=7, mines=mines, seeds=range(100, 116))
+    for i in range(batch.count):
+        game = Environment.Environment(height=6, width=7, mines=mines, seed=100 + i)
+        assert np.array_equal(batch.boards[i], game.board)
+        assert np.array_equal(batch.clues[i], game.clues)
+
+
+@pytest.mark.parametrize("endOnMine", [True, False])
+def test_steps_match_environment(endOnMine):
+    # Play random moves (including cells that were already played) on every board of the batch and on one Environment
+    # per board, with Environment.floodReveal opening the empty regions, and compare them after every step. Finished
+    # boards must come back as Environment(seed=...) for their seed moved on by count.
+    count, height, width, mines = 12, 6, 7, 8
+    batch = BatchEnvironment.BatchEnvironment(count, height, width, mines, endOnMine=endOnMine)
+    seeds = list(range(count))
+    games = [Environment.Environment(height=height, width=width, mines=mines, seed=seed) for seed in seeds]
+    revealed = [set() for _ in range(count)]
+    triggered = [set() for _ in range(count)]
+    finished = 0
+
+    rng = np.random.default_rng(0)
+    for _ in range(400):
+        moves = rng.integers(height * width, size=count)
+        outcome, clue, done = batch.step(moves)
+        for i, move in enumerate(moves.tolist()):
+            cell = divmod(move, width)
+            game = games[i]
+            if cell in revealed[i] or cell in triggered[i]:
+                assert (outcome[i], clue[i], done[i]) == (BatchEnvironment.NOTHING, -1, False)
+                continue
+            if game.is_mine(cell):
+                triggered[i].add(cell)
+                assert (outcome[i], clue[i]) == (BatchEnvironment.MINE, -1)
+                over = endOnMine
+            else:
+                opened = game.floodReveal(cell, revealed[i])
+                revealed[i].update(opened_cell for opened_cell, _ in opened)
+                assert (outcome[i], clue[i]) == (BatchEnvironment.SAFE, game.mineNeighbor(cell))
+                over = len(revealed[i]) == height * width - mines
+            assert done[i] == over
+            if over:
+                finished += 1
+                seeds[i] += count
+                games[i] = Environment.Environment(height=height, width=width, mines=mines, seed=seeds[i])
+                revealed[i], triggered[i] = set(), set()
+
+        assert batch.seeds.tolist() == seeds
+        for i, game in enumerate(games):
+            assert np.array_equal(batch.boards[i], game.board)
+            expected = np.full((height, width), BatchEnvironment.HIDDEN, dtype=np.int8)
+            for cell in revealed[i]:
+                expected[cell] = game.mineNeighbor(cell)
+            for cell in triggered[i]:
+                expected[cell] = BatchEnvironment.TRIGGERED
+            assert np.array_equal(batch.observation[i], expected)
+    assert batch.games == finished > count  # every board was reset at least once on average
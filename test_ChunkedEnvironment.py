@@ -0,0 +1,32 @@
+import random
+
+import ChunkedEnvironment
+
+
+def test_clues_and_mines_survive_eviction():
+    # 29x35 with chunks of 8 leaves partial chunks along the bottom and right edges. The smallest budget keeps only the
+    # 9 chunks needed to count one clue, so walking the board evicts and regenerates chunks all the time
+    height, width, mines = 29, 35, 180
+    for seed in range(2):
+        game = ChunkedEnvironment.ChunkedEnvironment(height, width, mines, seed=seed, chunkSize=8, memoryBudget=0)
+        reference = ChunkedEnvironment.ChunkedEnvironment(height, width, mines, seed=seed, chunkSize=8)
+        assert game.maxChunks == 9
+        cells = [(i, j) for i in range(height) for j in range(width)]
+
+        board = {cell: game.is_mine(cell) for cell in cells}
+        assert sum(board.values()) == mines
+        assert len(game.chunks) <= game.maxChunks
+
+        # Count every clue again from is_mine, across chunk borders, and ask for the cells in a random order so the
+        # chunks come back after being dropped
+        order = random.Random(seed).sample(cells, len(cells))
+        for cell in order:
+            i, j = cell
+            expected = sum(board[(row, col)] for row in range(i - 1, i + 2) for col in range(j - 1, j + 2)
+                           if (row, col) != cell and 0 <= row < height and 0 <= col < width)
+            assert game.mineNeighbor(cell) == expected == reference.mineNeighbor(cell)
+            assert game.is_mine(cell) == board[cell]
+        assert len(game.chunks) <= game.maxChunks
+        assert game.chunksGenerated > game.chunkRows * game.chunkCols  # chunks were evicted and regenerated
+        assert reference.chunksGenerated == reference.chunkRows * reference.chunkCols
+        assert len(game.mines) == mines
@@ -0,0 +1,46 @@
+import BasicAgent
+import Environment
+import ImprovedAgent
+
+
+def test_flood_reveal_opens_a_flagged_starting_cell():
+    game = Environment.Environment(height=8, width=8, mines=6, seed=3)
+    cell = next((i, j) for i in range(8) for j in range(8) if not game.is_mine((i, j)))
+    opened = game.floodReveal(cell, flags={cell})
+    assert opened[0] == (cell, game.mineNeighbor(cell))
+
+
+def test_flood_reveal_leaves_flagged_neighbors_alone():
+    game = Environment.Environment(height=8, width=8, mines=6, seed=3)
+    cells = [(i, j) for i in range(8) for j in range(8)]
+    start = next(cell for cell in cells if game.mineNeighbor(cell) == 0 and not game.is_mine(cell))
+    flagged = next(cell for cell, _ in game.floodReveal(start) if cell != start)
+    opened = [cell for cell, _ in game.floodReveal(start, flags={flagged})]
+    assert start in opened and flagged not in opened
+
+
+def test_agents_play_safe_cells_the_user_flagged():
+    # Like the "AI Move" button when the user has flagged every cell the agent is about to reveal: each safe move must
+    # still be revealed, so the agent moves on instead of suggesting the same cell again
+    for agent in (BasicAgent.BasicAgent, ImprovedAgent.ImprovedAgent):
+        for keepFlags in (False, True):  # with and without the gameplay scripts taking the flag off
+            game = Environment.Environment(height=10, width=10, mines=12, seed=5)
+            ai = agent(height=10, width=10)
+            start = next((i, j) for i in range(10) for j in range(10) if game.mineNeighbor((i, j)) == 0
+                         and not game.is_mine((i, j)))
+            revealed, flags = set(), set()
+            opened = game.floodReveal(start, revealed, flags)
+            revealed.update(cell for cell, _ in opened)
+            ai.add_knowledge_many(opened)
+
+            moves = []
+            while (move := ai.move_safely()) is not None and len(moves) < 100:
+                flags.add(move)
+                if not keepFlags:
+                    flags.discard(move)
+                opened = game.floodReveal(move, revealed, flags)
+                assert opened and opened[0][0] == move
+                revealed.update(cell for cell, _ in opened)
+                ai.add_knowledge_many(opened)
+                moves.append(move)
+            assert moves and len(moves) == len(set(moves))
@@ -0,0 +1,65 @@
+import itertools
+import math
+import random
+
+import Clue
+import FrontierSolver
+
+
+def randomPosition(rng, height, width, mines, revealed):
+    """
+    Returns the clues and the undecided cells of a random board after revealing a few safe cells
+    """
+    cells = [(i, j) for i in range(height) for j in range(width)]
+    board = set(rng.sample(cells, mines))
+    opened = rng.sample([cell for cell in cells if cell not in board], revealed)
+    undecided = [cell for cell in cells if cell not in opened]
+    clues = []
+    for i, j in opened:
+        neighbors = [(i + di, j + dj) for di in (-1, 0, 1) for dj in (-1, 0, 1)
+                     if (di or dj) and 0 <= i + di < height and 0 <= j + dj < width]
+        clues.append(Clue.Clue([cell for cell in neighbors if cell not in opened],
+                               sum(cell in board for cell in neighbors)))
+    return clues, undecided
+
+
+def bruteForce(clues, undecided, mines):
+    """
+    Returns the mine probability of every undecided cell, over every placement of the mines that fits the clues
+    """
+    counts = dict.fromkeys(undecided, 0)
+    total = 0
+    for placement in itertools.combinations(undecided, mines):
+        placed = set(placement)
+        if all(len(clue.cells & placed) == clue.count for clue in clues):
+            total += 1
+            for cell in placement:
+                counts[cell] += 1
+    return {cell: count / total for cell, count in counts.items()}
+
+
+def test_weigh_single_component():
+    # One clue {a, b} = 1 has 2 solutions with 1 mine; the other mine goes to one of 3 interior cells
+    solver = FrontierSolver.FrontierSolver()
+    probabilities, interior = solver.weigh([([(0, 0), (0, 1)], {1: (2, [1, 1])})], mines=2, interior=3)
+    assert probabilities == {(0, 0): 0.5, (0, 1): 0.5}
+    assert math.isclose(interior, 1 / 3)
+
+
+def test_weigh_impossible_mine_count():
+    solver = FrontierSolver.FrontierSolver()
+    assert solver.weigh([([(0, 0), (0, 1)], {1: (2, [1, 1])})], mines=5, interior=3) == ({}, None)
+
+
+def test_solve_matches_brute_force():
+    rng = random.Random(0)
+    solver = FrontierSolver.FrontierSolver()
+    for _ in range(60):
+        mines = rng.randint(3, 6)
+        clues, undecided = randomPosition(rng, 4, 5, mines, rng.randint(3, 7))
+        expected = bruteForce(clues, undecided, mines)
+
+        probabilities = solver.solve(clues, mines, len(undecided))
+        for cell in undecided:
+            probability = probabilities.get(cell, solver.interiorProbability)
+            assert math.isclose(probability, expected[cell], abs_tol=1e-12), cell
@@ -0,0 +1,86 @@
+import random
+
+import Clue
+import KnowledgeBase
+
+
+def checkInvariants(knowledgeBase):
+    """
+    Every clue is filed under its own key, no two clues are equal, and the cell index lists exactly the clues
+    containing each cell
+    """
+    assert len(knowledgeBase.keys) == len(knowledgeBase.clues)
+    for clue in knowledgeBase:
+        assert knowledgeBase.keys[clue.key()] is clue
+    indexed = {}
+    for cell, containing in knowledgeBase.cellIndex.items():
+        assert containing
+        for clue in containing.values():
+            assert id(clue) in knowledgeBase.clues
+            indexed.setdefault(id(clue), set()).add(cell)
+    for clue in knowledgeBase:
+        assert indexed.get(id(clue), set()) == clue.cells
+
+
+def test_append_skips_equal_clue():
+    knowledgeBase = KnowledgeBase.KnowledgeBase()
+    assert knowledgeBase.append(Clue.Clue([(0, 0), (0, 1)], 1))
+    assert not knowledgeBase.append(Clue.Clue([(0, 1), (0, 0)], 1))
+    assert knowledgeBase.append(Clue.Clue([(0, 0), (0, 1)], 2))
+    assert len(knowledgeBase) == 2
+    checkInvariants(knowledgeBase)
+
+
+def test_membership_and_removal_by_equal_clue():
+    knowledgeBase = KnowledgeBase.KnowledgeBase([Clue.Clue([(0, 0), (0, 1)], 1), Clue.Clue([(1, 1)], 0)])
+    assert Clue.Clue([(0, 1), (0, 0)], 1) in knowledgeBase
+    assert Clue.Clue([(0, 0), (0, 1)], 0) not in knowledgeBase
+    knowledgeBase.remove(Clue.Clue([(0, 0), (0, 1)], 1))
+    assert [clue.key() for clue in knowledgeBase] == [Clue.Clue([(1, 1)], 0).key()]
+    checkInvariants(knowledgeBase)
+
+
+def test_shrinking_into_a_known_clue_keeps_the_known_one():
+    known = Clue.Clue([(0, 0)], 0)
+    shrinking = Clue.Clue([(0, 0), (0, 1)], 1)
+    knowledgeBase = KnowledgeBase.KnowledgeBase([known, shrinking])
+    knowledgeBase.TakeChanged()
+    while knowledgeBase.PopWork() is not None:
+        pass
+
+    assert knowledgeBase.MarkMine((0, 1)) == 1
+    assert list(knowledgeBase) == [known]
+    assert knowledgeBase.TakeChanged() == [known]
+    assert knowledgeBase.PopWork() is known
+    assert knowledgeBase.PopWork() is None
+    checkInvariants(knowledgeBase)
+
+
+def test_iteration_keeps_insertion_order():
+    clues = [Clue.Clue([(0, j), (1, j)], 1) for j in range(5)]
+    knowledgeBase = KnowledgeBase.KnowledgeBase(clues)
+    knowledgeBase.MarkSafe((1, 3))
+    knowledgeBase.remove(clues[1])
+    assert list(knowledgeBase) == [clues[0], clues[2], clues[3], clues[4]]
+
+
+def test_invariants_hold_through_random_marks():
+    rng = random.Random(0)
+    for _ in range(50):
+        knowledgeBase = KnowledgeBase.KnowledgeBase()
+        cells = [(i, j) for i in range(4) for j in range(4)]
+        for _ in range(40):
+            clueCells = rng.sample(cells, rng.randint(1, 4))
+            knowledgeBase.append(Clue.Clue(clueCells, rng.randint(0, len(clueCells))))
+        checkInvariants(knowledgeBase)
+        for cell in rng.sample(cells, len(cells)):
+            if rng.random() < 0.5:
+                knowledgeBase.MarkMine(cell)
+            else:
+                knowledgeBase.MarkSafe(cell)
+            checkInvariants(knowledgeBase)
+            for clue in knowledgeBase.copy():
+                if not clue.cells and rng.random() < 0.5:
+                    knowledgeBase.remove(clue)
+            checkInvariants(knowledgeBase)
+        assert len(knowledgeBase) == len({clue.count for clue in knowledgeBase})  # only empty clues are left
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+import ChunkedEnvironment
+import Environment
+import Simulation
+import Snapshot
+
+
+def play(game, ai, revealed, triggered, limit=None):
+    """
+    Play like Simulation.playGame until the agent runs out of moves, or for limit moves, and return the moves made.
+    An agent that keeps suggesting cells that were already played fails instead of looping forever.
+    """
+    moves = []
+    for _ in range(2 * game.height * game.width):
+        if limit is not None and len(moves) == limit:
+            break
+        move = Simulation.chooseMove(ai)
+        if move is None:
+            break
+        if move in revealed or move in triggered:
+            continue
+        moves.append(move)
+        if game.is_mine(move):
+            ai.MarkMine(move)
+            triggered.add(move)
+        else:
+            opened = game.floodReveal(move, revealed)
+            revealed.update(cell for cell, _ in opened)
+            ai.add_knowledge_many(opened)
+    else:
+        pytest.fail("the agent kept suggesting cells that were already played")
+    return moves
+
+
+@pytest.mark.parametrize("agent, options, chunkSize", [
+    ("basic", {}, None),
+    ("improved", {}, None),
+    ("improved", {"guess": "exact", "mines": 60}, None),
+    ("improved", {"bitmask": True}, None),
+    ("basic", {}, 8),
+    ("improved", {}, 8),
+])
+def test_loaded_game_continues_move_for_move(tmp_path, agent, options, chunkSize):
+    height, width, mines = 24, 20, 60
+    for seed in range(3):
+        random.seed(seed)
+        ai = Simulation.makeAgent(agent, height, width, options)
+        if chunkSize is None:
+            game = Environment.Environment(height=height, width=width, mines=mines, seed=seed)
+        else:
+            game = ChunkedEnvironment.ChunkedEnvironment(height, width, mines, seed=seed, chunkSize=chunkSize)
+        revealed, triggered = set(), set()
+        assert len(play(game, ai, revealed, triggered, limit=15)) == 15
+
+        path = tmp_path / f"{agent}-{seed}.snap"
+        Snapshot.save(path, game, ai)
+        loadedGame, loadedAi = Snapshot.load(path)
+        assert type(loadedGame) is type(game) and type(loadedAi) is type(ai)
+
+        # The player's revealed cells and triggered mines are not part of the snapshot: carry them over by hand
+        random.seed(100 + seed)
+        original = play(game, ai, set(revealed), set(triggered))
+        random.seed(100 + seed)
+        loaded = play(loadedGame, loadedAi, set(revealed), set(triggered))
+        assert original and loaded == original